@@ -1,3 +1,9 @@
 from .serial_adapter import SerialAdapter
 from .socket_adapter import SocketAdapter
+from .async_socket_adapter import AsyncSocketAdapter
 from .esp_adc import EspAdc
+from .async_esp_adc import AsyncEspAdc
+from .session import SessionManager, DeviceSession
+from .fleet import FleetPoller, FleetDevice
+from .sequence import SequenceTracker
+from .scheduler import DeadlineScheduler
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Union
+
+from api.base import BaseInstrument
+from api.constants import ASYNC_SOCKET
+from api.esp_adc import AdcData, AdcSample, EspAdc
+from api.exceptions import DeviceCloseError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEspAdc(BaseInstrument):
+    """
+    asyncio version of ``EspAdc``. Use as ``async with AsyncEspAdc(host, port) as daq: await daq.read_data()``.
+    """
+
+    def __init__(self, host: str, port, adapter: str = ASYNC_SOCKET, *args, **kwargs):
+        super().__init__(host, port, adapter, *args, **kwargs)
+
+    def __enter__(self):
+        # синхронный with не может дождаться корутины close(), и сокет остался бы открытым
+        raise TypeError(f"Use 'async with {self.__class__.__name__}(...)' instead of 'with'")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        raise TypeError(f"Use 'async with {self.__class__.__name__}(...)' instead of 'with'")
+
+    async def __aenter__(self):
+        if self.adapter is None:
+            self._set_adapter()
+            await self.adapter.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await self.close()
+        except OSError as e:
+            raise DeviceCloseError(str(e))
+
+    async def close(self):
+        if self.adapter:
+            await self.adapter.close()
+
+    async def read_data(self, with_timestamp: bool = False) -> Optional[Union[AdcData, AdcSample]]:
+        try:
+            response = await self.query("adc")
+        except UnicodeDecodeError:
+            return None
+        return EspAdc.parse_adc(response, with_timestamp)
+
+    async def read_data_many(
+        self, n: int, depth: int = None, with_timestamp: bool = False
+    ) -> List[Optional[Union[AdcData, AdcSample]]]:
+        responses = await self.query_many(["adc"] * n, depth=depth)
+        return [EspAdc.parse_adc(response, with_timestamp) for response in responses]
+
+    async def get_ip(self):
+        try:
+            return await self.query("ip")
+        except UnicodeDecodeError:
+            return "Unknown IP"
+
+    async def start_record(self, file: str = ""):
+        name = file or EspAdc._default_filename()
+        if not name.startswith("/"):
+            name = "/" + name
+        return await self.query(f"start={name}")
+
+    async def stop_record(self):
+        return await self.query("stop")
+
+    async def check_recording_status(self):
+        return await self.query("checkRecording")
+
+    async def get_files(self) -> List[Dict]:
+        return EspAdc.parse_files(await self.query("files"))
+
+    async def delete_file(self, file: str):
+        return await self.query(f"delete={file}")
+
+    async def download_file(self, file: str, on_progress=None, chunk_size: int = 256 * 1024, dest_path: str = None):
+        """Streaming download over ``asyncio.StreamReader``. Returns (ok, msg) like ``EspAdc.download_file``."""
+        file_name = file.lstrip("/\\").rsplit("/", 1)[-1]
+        if not file_name:
+            return False, "Invalid filename"
+
+        await self.write(f"hostFile={file_name}")
+        header = (await self.adapter.read_line()).decode("ascii", errors="ignore")
+        if header.startswith("Error") or not header.startswith("SIZE "):
+            return False, (header or "Error: no header")
+        try:
+            total_size = int(header.split()[1])
+        except (IndexError, ValueError):
+            return False, f"Invalid header: {header}"
+
+        downloaded = 0
+        with open(dest_path or file, "wb") as f_out:
+            while downloaded < total_size:
+                try:
+                    chunk = await self.adapter.read(min(chunk_size, total_size - downloaded))
+                except asyncio.TimeoutError:
+                    break
+                if not chunk:
+                    break
+                f_out.write(chunk)
+                downloaded += len(chunk)
+                if callable(on_progress):
+                    on_progress(downloaded, total_size)
+
+        if downloaded != total_size:
+            return False, f"Download incomplete: {downloaded}/{total_size} bytes"
+        return True, f"File {file} downloaded ({downloaded} bytes)"
+
+    async def init_sd(self):
+        return await self.query("initSD")
+
+    async def deinit_sd(self):
+        return await self.query("deinitSD")
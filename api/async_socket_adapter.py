@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import List, Union
+
+from api.base import AdapterInterface
+from api.exceptions import DeviceConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSocketAdapter(AdapterInterface):
+    """
+    asyncio counterpart of ``SocketAdapter``: same newline-framed protocol, but every I/O method is a coroutine.
+    The connection is opened by ``connect()`` (called from ``AsyncEspAdc.__aenter__``), not in the constructor.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: Union[str, int],
+        timeout: float = 10,
+        pipeline_depth: int = 8,
+        limit: int = 1024 * 1024,
+        *args,
+        **kwargs,
+    ):
+        self.host = host
+        try:
+            self.port = int(port)
+        except ValueError:
+            raise DeviceConnectionError("Incorrect port")
+        self.timeout = timeout
+        self.pipeline_depth = max(int(pipeline_depth), 1)
+        self.limit = limit
+        self.reader: asyncio.StreamReader = None
+        self.writer: asyncio.StreamWriter = None
+
+    async def connect(self, timeout: float = None):
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, limit=self.limit), timeout or self.timeout
+            )
+            logger.debug(f"[{self.__class__.__name__}.connect] Connected to {self.host}:{self.port}")
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.debug(f"[{self.__class__.__name__}.connect] Error: {e}")
+            raise DeviceConnectionError("Unable to connect socket")
+
+    def is_socket_closed(self) -> bool:
+        return self.writer is None or self.writer.is_closing() or self.reader.at_eof()
+
+    async def close(self):
+        if self.writer is None:
+            logger.warning(f"[{self.__class__.__name__}.close] Socket is None")
+            return
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+        self.reader = self.writer = None
+        logger.debug(f"[{self.__class__.__name__}.close] Socket has been closed.")
+
+    async def write(self, command: str, **kwargs):
+        self.writer.write(("%s\n" % command).encode("ascii"))
+        await self.writer.drain()
+
+    async def read_line(self, timeout: float = None) -> bytes:
+        try:
+            line = await asyncio.wait_for(self.reader.readuntil(b"\n"), timeout or self.timeout)
+        except asyncio.IncompleteReadError:
+            raise DeviceConnectionError("Connection closed by device")
+        return line.rstrip(b"\r\n")
+
+    async def read(self, num_bytes=1024, **kwargs) -> bytes:
+        return await asyncio.wait_for(self.reader.read(num_bytes), self.timeout)
+
+    async def query(self, command: str, timeout: float = None, **kwargs) -> str:
+        await self.write(command)
+        line = await self.read_line(timeout=timeout)
+        return line.decode("ascii").rstrip()
+
+    async def query_many(self, commands: List[str], depth: int = None, timeout: float = None, **kwargs) -> List[str]:
+        depth = max(int(depth or self.pipeline_depth), 1)
+        responses = []
+        sent = 0
+        while len(responses) < len(commands):
+            window_end = min(len(responses) + depth, len(commands))
+            if sent < window_end:
+                self.writer.write("".join("%s\n" % command for command in commands[sent:window_end]).encode("ascii"))
+                await self.writer.drain()
+                sent = window_end
+            line = await self.read_line(timeout=timeout)
+            responses.append(line.decode("ascii", errors="replace").rstrip())
+        return responses
@@ -1,5 +1,5 @@
 import logging
-from typing import Union
+from typing import List, Union
 
 from api.constants import ADAPTERS
 from api.exceptions import DeviceConnectionError, DeviceCloseError
@@ -26,6 +26,9 @@ class AdapterInterface:
     def query(self, *args, **kwargs):
         raise NotImplementedError
 
+    def query_many(self, commands: List[str], **kwargs) -> List[str]:
+        return [self.query(command, **kwargs) for command in commands]
+
     def write(self, *args, **kwargs):
         raise NotImplementedError
 
@@ -77,6 +80,9 @@ class BaseInstrument:
     def query(self, cmd: str, **kwargs) -> str:
         return self.adapter.query(cmd, **kwargs)
 
+    def query_many(self, commands: List[str], **kwargs) -> List[str]:
+        return self.adapter.query_many(commands, **kwargs)
+
     def write(self, cmd: str) -> None:
         return self.adapter.write(cmd)
 
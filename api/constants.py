@@ -3,9 +3,13 @@ from typing import Literal
 
 SOCKET = "Socket"
 SERIAL = "Serial"  # left for backward compatibility
+ASYNC_SOCKET = "AsyncSocket"
 ADAPTERS = {
     SOCKET: "api.SocketAdapter",
+    ASYNC_SOCKET: "api.AsyncSocketAdapter",
 }
+# asyncio adapters work only with AsyncEspAdc
+ASYNC_ADAPTERS = (ASYNC_SOCKET,)
 
 GAIN_TYPES = Literal[0, 1, 2, 3, 4, 5]
 GAINS = {
@@ -16,6 +20,18 @@ GAINS = {
     4: "+/- 0.512 V",
     5: "+/- 0.256 V",
 }
+# вес младшего разряда ADS1115 в мВ для каждого индекса усиления
+GAIN_LSB_MV = {
+    0: 6144.0 / 32768,
+    1: 4096.0 / 32768,
+    2: 2048.0 / 32768,
+    3: 1024.0 / 32768,
+    4: 512.0 / 32768,
+    5: 256.0 / 32768,
+}
+
+FORMAT_TYPES = Literal["text", "bin"]
+FORMATS = ["text", "bin"]
 
 WIFI_TYPES = Literal["own", "other"]
 WIFI = ["own", "other"]
@@ -0,0 +1,101 @@
+import os
+import time
+from typing import Dict, Optional
+
+
+class DownloadStats:
+    """Throughput telemetry of one ``EspAdc.download_file`` call, kept in ``EspAdc.last_download``."""
+
+    # пауза между порциями данных, после которой считаем, что передача «встала»
+    STALL_THRESHOLD = 0.5
+
+    def __init__(self, file: str):
+        self.file = file
+        self.total_size = 0
+        self.resumed_from = 0
+        self.received = 0
+        self.attempts = 0
+        self.stalls = 0
+        self.longest_stall = 0.0
+        self.rcvbuf = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._last_recv: Optional[float] = None
+
+    def record(self, num_bytes: int, now: float = None):
+        now = time.perf_counter() if now is None else now
+        if self._last_recv is not None:
+            gap = now - self._last_recv
+            if gap > self.STALL_THRESHOLD:
+                self.stalls += 1
+            self.longest_stall = max(self.longest_stall, gap)
+        self._last_recv = now
+        self.received += num_bytes
+
+    def restart(self):
+        """New attempt: the pause for reconnecting is not a stall."""
+        self.attempts += 1
+        self._last_recv = None
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def mbps(self) -> float:
+        return self.received / self.seconds / (1024 * 1024) if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "file": self.file,
+            "total_size": self.total_size,
+            "resumed_from": self.resumed_from,
+            "received": self.received,
+            "seconds": self.seconds,
+            "mbps": self.mbps,
+            "attempts": self.attempts,
+            "stalls": self.stalls,
+            "longest_stall": self.longest_stall,
+            "rcvbuf": self.rcvbuf,
+        }
+
+
+def read_offset(part_path: str) -> int:
+    """
+    Committed size of a partial download. The ``.part`` file is preallocated to the full size,
+    so the offset lives in a ``.offset`` sidecar; without one the whole ``.part`` counts as received.
+    """
+    if not os.path.isfile(part_path):
+        return 0
+    try:
+        with open(part_path + ".offset") as f:
+            return min(int(f.read().strip() or 0), os.path.getsize(part_path))
+    except FileNotFoundError:
+        return os.path.getsize(part_path)
+    except ValueError:
+        return 0
+
+
+def write_offset(part_path: str, offset: int):
+    with open(part_path + ".offset", "w") as f:
+        f.write(str(offset))
+
+
+def remove_partial(part_path: str):
+    for path in (part_path, part_path + ".offset"):
+        if os.path.isfile(path):
+            os.unlink(path)
+
+
+def preallocate(f, size: int):
+    """Reserve ``size`` bytes for the file up front so the disk does not fragment it while it grows."""
+    if os.fstat(f.fileno()).st_size > size:
+        f.truncate(size)
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except (AttributeError, OSError):
+        # Windows и файловые системы без fallocate
+        f.truncate(size)
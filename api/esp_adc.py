@@ -1,41 +1,215 @@
 import logging
+import os
 import re
 import socket
-from typing import Tuple, Optional
+import time
+from typing import Dict, List, Tuple, Optional, Union
+
+import numpy as np
 
 from api.base import BaseInstrument
-from api.constants import GAIN_TYPES, WIFI_TYPES
+from api.constants import FORMAT_TYPES, GAIN_TYPES, WIFI_TYPES
+from api.download import DownloadStats, preallocate, read_offset, remove_partial, write_offset
+from api.exceptions import DeviceConnectionError, DeviceProtocolError
+from api.protocol import FRAME_HEADER, FRAME_MAGIC, FrameHeader, decode_records, parse_header, to_mv
+from api.stream import SampleStream
 
 logger = logging.getLogger(__name__)
 
+ADC_RESPONSE_RE = re.compile(r"ADC0:\s*([\d.-]+)\s*mV;\s*ADC1:\s*([\d.-]+)\s*mV;\s*ADC2:\s*([\d.-]+)\s*mV;")
+# старые прошивки не добавляют метку времени и номер отсчёта к ответу adc
+ADC_TIMESTAMP_RE = re.compile(r"TS:\s*(\d+)\s*ms;\s*SEQ:\s*(\d+);")
+
+# прошивка перезагружается через полсекунды после ответа на wifi=, старая — не отвечая вовсе
+WIFI_REPLY_TIMEOUT = 3
+WIFI_RESTARTING = "Restarting to apply WiFi settings"
+
+AdcData = Tuple[float, float, float]
+# (seq, timestamp_ms, a0, a1, a2); seq и timestamp_ms равны None, если прошивка их не передаёт
+AdcSample = Tuple[Optional[int], Optional[int], float, float, float]
+
 
 class EspAdc(BaseInstrument):
     """
     A class to interface with the ESP ADC data acquisition system.
     """
 
-    def read_data(self) -> Optional[Tuple[float, float, float]]:
+    # формат отсчётов согласуется на время соединения, см. set_format
+    binary = False
+    # seq следующего отсчёта, который вернёт read_since, и число отсчётов, потерянных из-за отставания
+    since_cursor: Optional[int] = None
+    overruns = 0
+    last_download: Optional[DownloadStats] = None
+
+    def set_format(self, fmt: FORMAT_TYPES) -> bool:
+        """
+        Switch ``adc`` replies and the push stream between text lines and binary frames (``api.protocol``).
+        Returns False when the firmware does not know the format; the connection then stays in text mode.
+        """
+        response = self.query(f"format={fmt}")
+        ok = response == f"OK format={fmt}"
+        if ok:
+            self.binary = fmt == "bin"
+        else:
+            logger.debug(f"[{self.__class__.__name__}.set_format] {response}")
+        return ok
+
+    def read_data(self, with_timestamp: bool = False) -> Optional[Union[AdcData, AdcSample]]:
+        """
+        Latest sample in mV. With ``with_timestamp`` the device sequence number and timestamp are prepended:
+        two replies with the same ``seq`` are the same sample (see ``api.SequenceTracker``).
+        """
+        if self.binary:
+            self.write("adc")
+            return self._frame_sample(self.read_frame(), with_timestamp)
         try:
             response = self.query("adc")
         except UnicodeDecodeError:
             return None
-        reg = re.compile(f"ADC0:\s*([\d.-]+)\s*mV;\s*ADC1:\s*([\d.-]+)\s*mV;\s*ADC2:\s*([\d.-]+)\s*mV;")
+        return self.parse_adc(response, with_timestamp)
+
+    def read_data_many(
+        self, n: int, depth: int = None, with_timestamp: bool = False
+    ) -> List[Optional[Union[AdcData, AdcSample]]]:
+        """Pipelined ``read_data``: ``n`` adc queries for the price of ``n / depth`` round trips."""
+        if self.binary:
+            return self._read_frames_many(n, depth=depth, with_timestamp=with_timestamp)
+        return [self.parse_adc(response, with_timestamp) for response in self.query_many(["adc"] * n, depth=depth)]
+
+    def _read_frames_many(
+        self, n: int, depth: int = None, with_timestamp: bool = False
+    ) -> List[Optional[Union[AdcData, AdcSample]]]:
+        depth = max(int(depth or self.adapter.pipeline_depth), 1)
+        result = []
+        sent = 0
+        while len(result) < n:
+            window_end = min(len(result) + depth, n)
+            if sent < window_end:
+                self.adapter.socket.sendall(b"adc\n" * (window_end - sent))
+                sent = window_end
+            result.append(self._frame_sample(self.read_frame(), with_timestamp))
+        return result
+
+    @staticmethod
+    def _frame_sample(frame, with_timestamp: bool = False) -> Optional[Union[AdcData, AdcSample]]:
+        if frame is None or not frame[1].size:
+            return None
+        header, records = frame
+        data = tuple(to_mv(records[-1:], header.gain)[0].tolist())
+        if with_timestamp:
+            return (int(records["seq"][-1]), int(records["ts"][-1]), *data)
+        return data
+
+    def read_since(self, seq: int = None) -> Optional[Dict]:
+        """
+        Every sample the device still holds in its ring buffer since the cursor (or since ``seq``).
+
+        Returns numpy arrays ``seq``, ``ts`` (device ms) and ``data`` (n x 3 mV) plus ``head``, the seq of the next
+        sample, and ``lost``, the number of samples overwritten on the device before they were fetched
+        (the client fell more than 256 samples behind). The first call, or a call after ``since_cursor`` was reset
+        to None, returns everything still buffered without counting losses. None if the ADC is not ready.
+        """
+        from_seq = self.since_cursor if seq is None else seq
+        command = f"adcSince={from_seq or 0}"
+        if self.binary:
+            self.write(command)
+            frame = self.read_frame()
+            if frame is None:
+                return None
+            header, records = frame
+            result = {
+                "seq": records["seq"],
+                "ts": records["ts"],
+                "data": to_mv(records, header.gain),
+                "head": header.head,
+            }
+        else:
+            result = self.parse_since(self.query(command))
+            if result is None:
+                return None
+        first = int(result["seq"][0]) if result["seq"].size else result["head"]
+        result["lost"] = max(first - from_seq, 0) if from_seq is not None else 0
+        self.overruns += result["lost"]
+        self.since_cursor = result["head"]
+        return result
+
+    @staticmethod
+    def parse_since(response: str) -> Optional[Dict]:
+        """Parse the text ``adcSince`` reply: ``HEAD <head>;<seq>,<ts>,<a0>,<a1>,<a2>;...``."""
+        if not response.startswith("HEAD "):
+            return None
+        head, _, body = response.partition(";")
         try:
-            parsed = re.findall(reg, response)[0]
-            return float(parsed[0]), float(parsed[1]), float(parsed[2])
-        except (IndexError, ValueError):
+            values = np.array([item.split(",") for item in body.split(";") if item], dtype=float).reshape(-1, 5)
+            head = int(head[5:])
+        except ValueError:
+            return None
+        return {
+            "seq": values[:, 0].astype(np.uint32),
+            "ts": values[:, 1].astype(np.uint32),
+            "data": values[:, 2:],
+            "head": head,
+        }
+
+    def read_frame(self) -> Optional[Tuple[FrameHeader, np.ndarray]]:
+        """
+        Read one binary frame: the header and its records as a structured array (see ``api.protocol``).
+        A text reply in place of a frame (e.g. "ADS1115 not ready") is consumed and None is returned.
+        """
+        if self.adapter.peek(len(FRAME_MAGIC)) != FRAME_MAGIC:
+            response = self.adapter.read_line().decode("ascii", errors="replace")
+            logger.debug(f"[{self.__class__.__name__}.read_frame] {response}")
+            return None
+        try:
+            header = parse_header(self.adapter.read_exact(FRAME_HEADER.size))
+        except ValueError as e:
+            raise DeviceProtocolError(str(e))
+        return header, decode_records(self.adapter.read_exact(header.payload_size))
+
+    @staticmethod
+    def parse_adc(response: str, with_timestamp: bool = False) -> Optional[Union[AdcData, AdcSample]]:
+        match = ADC_RESPONSE_RE.search(response)
+        if not match:
+            return None
+        try:
+            data = float(match.group(1)), float(match.group(2)), float(match.group(3))
+        except ValueError:
             return None
+        if not with_timestamp:
+            return data
+        match = ADC_TIMESTAMP_RE.search(response)
+        if not match:
+            return (None, None, *data)
+        return (int(match.group(2)), int(match.group(1)), *data)
+
+    def stream(self, callback=None, buffer_size: int = 4096) -> SampleStream:
+        """
+        Switch the connection to server-push mode: the device sends every sample until the stream is stopped.
+        Use as ``with daq.stream() as stream: for seq, ts, a0, a1, a2 in stream: ...``.
+        """
+        return SampleStream(self, buffer_size=buffer_size, callback=callback).start()
 
     def set_gain(self, gain: GAIN_TYPES):
-        self.write(f"setGain={gain}")
+        return self.query(f"adsGain={gain}")
 
     def set_wifi(
         self,
         wifi: WIFI_TYPES,
         ssid: str,
         pwd: str,
-    ):
-        self.write(f"wifi={wifi};ssid={ssid};pwd={pwd}")
+    ) -> str:
+        """
+        Apply WiFi settings; the board replies and restarts, an ``Error`` reply (e.g. while recording) raises.
+        Older firmware restarts without a reply: the connection is cut, which is taken as success too.
+        """
+        try:
+            response = self.query(f"wifi={wifi};ssid={ssid};pwd={pwd}", timeout=WIFI_REPLY_TIMEOUT)
+        except (OSError, DeviceConnectionError) as e:
+            logger.debug(f"[{self.__class__.__name__}.set_wifi] No reply, the board is restarting: {e}")
+            return WIFI_RESTARTING
+        if response.startswith("Error"):
+            raise DeviceProtocolError(response)
+        return response
 
     def get_ip(self):
         try:
@@ -63,7 +237,56 @@ class EspAdc(BaseInstrument):
         return self.query("checkRecording")
 
     def get_files(self):
-        response = self.query("files")
+        return self.parse_files(self.query("files"))
+
+    def recording_progress(self) -> Tuple[Optional[str], int]:
+        """
+        Name and size on the card of the file being recorded, one pipelined round trip.
+        The size grows by whole lines when the firmware flushes its sample buffer; (None, -1) if not recording.
+        """
+        recording, files = self.query_many(["checkRecording", "files"])
+        prefix = "Recording to "
+        if not recording.startswith(prefix):
+            return None, -1
+        name = recording[len(prefix) :].strip().lstrip("/")
+        sizes = {} if files.startswith("Error") else {f["name"]: f["size"] for f in self.parse_files(files)}
+        return name, sizes.get(name, -1)
+
+    def read_file(self, file: str, offset: int = 0) -> Tuple[int, bytes]:
+        """
+        Bytes of an SD file from ``offset`` to its end and the file size (``hostFile=<name>:<offset>``),
+        e.g. the tail appended to the active recording since the last call.
+        The firmware closes the socket after a transfer, so the connection is reopened before returning.
+        """
+        file_name = file.lstrip("/\\").rsplit("/", 1)[-1]
+        try:
+            self.write(f"hostFile={file_name}:{offset}" if offset else f"hostFile={file_name}")
+            header = self.adapter.read_line().decode("ascii", errors="ignore")
+            fields = header.split()
+            if len(fields) < 2 or fields[0] != "SIZE":
+                raise DeviceProtocolError(header or "Error: no header")
+            try:
+                total_size = int(fields[1])
+                start = int(fields[3]) if len(fields) >= 4 and fields[2] == "OFFSET" else 0
+            except (IndexError, ValueError):
+                raise DeviceProtocolError(f"Invalid header: {header}")
+            if start != offset:
+                raise DeviceProtocolError(f"Firmware does not support offsets: {header}")
+            return total_size, self.adapter.read_exact(total_size - start)
+        finally:
+            self.reconnect()
+
+    def get_status(self) -> Dict:
+        """Recording status, file list and IP in one pipelined round trip."""
+        recording, files, ip = self.query_many(["checkRecording", "files", "ip"])
+        return {
+            "recording": recording,
+            "files": [] if files.startswith("Error") else self.parse_files(files),
+            "ip": ip,
+        }
+
+    @staticmethod
+    def parse_files(response: str) -> List[Dict]:
         files = []
         for item in response.split(";"):
             if not item:
@@ -82,8 +305,38 @@ class EspAdc(BaseInstrument):
     def delete_file(self, file: str):
         return self.query(f"delete={file}")
 
-    def download_file(self, file: str, on_progress=None, chunk_size: int = 256 * 1024, dest_path: str = None):
-        """Скачать файл по TCP с прогрессом-колбэком (байты_скачано, всего_байт). Возвращает (ok, msg)."""
+    def reconnect(self):
+        """Open a fresh connection, e.g. after ``hostFile=`` (the firmware closes the socket after a transfer)."""
+        try:
+            self.close()
+        except OSError as e:
+            logger.debug(f"[{self.__class__.__name__}.reconnect] {e}")
+        self.adapter = None
+        self.binary = False
+        self._set_adapter()
+
+    def download_file(
+        self,
+        file: str,
+        on_progress=None,
+        chunk_size: int = 256 * 1024,
+        dest_path: str = None,
+        retries: int = 5,
+        backoff: float = 0.5,
+        progress_interval: float = 0.1,
+        on_data=None,
+    ):
+        """
+        Скачать файл по TCP с прогрессом-колбэком (байты_скачано, всего_байт). Возвращает (ok, msg).
+
+        Данные пишутся в заранее выделенный ``<dest_path>.part``, принятое смещение — в ``.part.offset``;
+        если они уже есть, загрузка продолжается с этого смещения (``hostFile=<name>:<offset>``).
+        Обрыв соединения повторяется до ``retries`` раз подряд без прогресса с паузой ``backoff * 2**n``;
+        файл переименовывается только после получения всех ``SIZE`` байт. ``on_progress`` вызывается
+        не чаще раза в ``progress_interval`` секунд, телеметрия загрузки — в ``self.last_download``.
+        ``on_data(chunk, position)`` получает каждый записанный кусок файла со смещением (например,
+        ``store.recording.RecordingConverter``); после переподключения куски могут прийти повторно.
+        """
 
         # Прошивка отклоняет имена с ведущим '/', поэтому используем только базовое имя
         file_name = file.lstrip("/\\")
@@ -91,49 +344,148 @@ class EspAdc(BaseInstrument):
         if not file_name:
             return False, "Invalid filename"
 
-        self.write(f"hostFile={file_name}")
-        # ускоряем передачу: отключаем Nagle и увеличиваем буфер приёма, если возможно
-        try:
-            self.adapter.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-            self.adapter.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 512 * 1024)
-        except OSError:
-            pass
+        target = dest_path or file
+        part_path = target + ".part"
+        stats = self.last_download = DownloadStats(file_name)
+        # один буфер на всю загрузку: recv_into пишет в него без создания новых bytes
+        buffer = bytearray(max(int(chunk_size), 4096))
+        failures = 0
+        if on_data is not None:
+            # уже скачанная в прошлый раз часть тоже должна пройти через on_data
+            self._replay_partial(part_path, read_offset(part_path), on_data, buffer)
+        while True:
+            offset = read_offset(part_path)
+            stats.restart()
+            try:
+                ok, msg = self._download_range(
+                    file_name, part_path, offset, on_progress, buffer, progress_interval, on_data
+                )
+            except (OSError, DeviceConnectionError) as e:
+                ok, msg = False, f"Download interrupted: {e}"
+            if ok:
+                stats.finish()
+                os.replace(part_path, target)
+                remove_partial(part_path)
+                return True, f"File {file} downloaded ({stats.total_size} bytes, {stats.mbps:.2f} MB/s)"
+            if offset and (msg.startswith("Error: Invalid offset") or msg.startswith("Error: Invalid filename")):
+                # файл на карте стал короче частичной копии или прошивка не знает смещений — начинаем заново
+                remove_partial(part_path)
+            elif msg.startswith("Error") or msg.startswith("Invalid header"):
+                stats.finish()
+                return False, msg
+            failures = 0 if read_offset(part_path) > offset else failures + 1
+            if failures > retries:
+                stats.finish()
+                return False, msg
+            delay = backoff * 2 ** max(failures - 1, 0)
+            logger.info(f"[{self.__class__.__name__}.download_file] {msg}; resuming in {delay:.1f} s")
+            time.sleep(delay)
+            try:
+                self.reconnect()
+            except DeviceConnectionError as e:
+                logger.debug(f"[{self.__class__.__name__}.download_file] {e}")
 
-        def _recv_line(sock) -> str:
-            buf = bytearray()
-            while True:
-                ch = sock.recv(1)
-                if not ch:
-                    break
-                if ch == b"\n":
+    @staticmethod
+    def _replay_partial(part_path: str, offset: int, on_data, buffer: bytearray):
+        if not offset:
+            return
+        with open(part_path, "rb") as f:
+            position = 0
+            while position < offset:
+                size = f.readinto(memoryview(buffer)[: min(len(buffer), offset - position)])
+                if not size:
                     break
-                buf.extend(ch)
-            return buf.decode("ascii", errors="ignore")
+                on_data(memoryview(buffer)[:size], position)
+                position += size
 
-        header = _recv_line(self.adapter.socket)
+    def _tune_receive_buffer(self, remaining: int, chunk_size: int) -> int:
+        """Nagle off and a receive buffer sized for the transfer: at least two chunks, at most 4 MB."""
+        sock = self.adapter.socket
+        wanted = min(max(2 * chunk_size, min(remaining, 256 * 1024)), 4 * 1024 * 1024)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < wanted:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, wanted)
+            return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        except OSError:
+            return 0
+
+    def _download_range(
+        self,
+        file_name: str,
+        part_path: str,
+        offset: int,
+        on_progress,
+        buffer: bytearray,
+        progress_interval: float,
+        on_data=None,
+    ):
+        """One ``hostFile=`` transfer into ``part_path`` from ``offset``. Returns (complete, msg)."""
+        stats = self.last_download
+        self.write(f"hostFile={file_name}:{offset}" if offset else f"hostFile={file_name}")
+        header = self.adapter.read_line().decode("ascii", errors="ignore")
         if header.startswith("Error") or not header.startswith("SIZE "):
             return False, (header or "Error: no header")
 
+        # "SIZE <n>" у старых прошивок, "SIZE <n> OFFSET <offset>" у новых
+        fields = header.split()
         try:
-            total_size = int(header.split()[1])
+            total_size = int(fields[1])
+            start = int(fields[3]) if len(fields) >= 4 and fields[2] == "OFFSET" else 0
         except (IndexError, ValueError):
             return False, f"Invalid header: {header}"
+        stats.total_size = total_size
+        if stats.attempts == 1:
+            stats.resumed_from = start
+        stats.rcvbuf = self._tune_receive_buffer(total_size - start, len(buffer))
 
-        downloaded = 0
-        target = dest_path or file
-        with open(target, "wb") as f_out:
-            while downloaded < total_size:
-                chunk = self.adapter.socket.recv(min(chunk_size, total_size - downloaded))
-                if not chunk:
+        sock = self.adapter.socket
+        view = memoryview(buffer)
+        downloaded = start
+        last_progress = 0.0
+        # смещение фиксируется в .offset после записи данных, поэтому после сбоя хвост просто докачивается заново
+        write_offset(part_path, start)
+        with open(part_path, "r+b" if os.path.isfile(part_path) else "w+b") as f_out:
+            preallocate(f_out, total_size)
+            f_out.seek(start)
+            # тело файла могло частично прийти вместе с заголовком
+            pending = self.adapter.pop_buffer(total_size - downloaded)
+            if pending:
+                f_out.write(pending)
+                if on_data is not None:
+                    on_data(pending, downloaded)
+                downloaded += len(pending)
+                stats.record(len(pending))
+            closed = False
+            while downloaded < total_size and not closed:
+                wanted = min(len(buffer), total_size - downloaded)
+                filled = 0
+                while filled < wanted:
+                    received = sock.recv_into(view[filled:wanted])
+                    if not received:
+                        closed = True
+                        break
+                    filled += received
+                    stats.record(received)
+                if not filled:
                     break
-                f_out.write(chunk)
-                downloaded += len(chunk)
-                if callable(on_progress):
-                    on_progress(downloaded, total_size)
+                f_out.write(view[:filled])
+                if on_data is not None:
+                    on_data(view[:filled], downloaded)
+                downloaded += filled
+                now = time.perf_counter()
+                if now - last_progress >= progress_interval or downloaded == total_size:
+                    last_progress = now
+                    f_out.flush()
+                    write_offset(part_path, downloaded)
+                    if callable(on_progress):
+                        on_progress(downloaded, total_size)
+            f_out.flush()
+        write_offset(part_path, downloaded)
 
         if downloaded != total_size:
             return False, f"Download incomplete: {downloaded}/{total_size} bytes"
-        return True, f"File {file} downloaded ({downloaded} bytes)"
+        return True, f"{downloaded} bytes"
 
     def init_sd(self):
         return self.query("initSD")
@@ -4,3 +4,7 @@ class DeviceConnectionError(Exception):
 
 class DeviceCloseError(Exception):
     ...
+
+
+class DeviceProtocolError(Exception):
+    ...
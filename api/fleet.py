@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from api.async_esp_adc import AsyncEspAdc
+from api.exceptions import DeviceConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class FleetDevice:
+    def __init__(self, device_id: str, host: str, port: Union[str, int] = 80):
+        self.device_id = device_id
+        self.host = host
+        self.port = port
+        # (host_time, latency, a0, a1, a2)
+        self.samples: List[Tuple[float, float, float, float, float]] = []
+        self.errors = 0
+        self.missed = 0
+
+    @classmethod
+    def from_spec(cls, spec: Union["FleetDevice", Dict, Tuple, str]) -> "FleetDevice":
+        """Accept a FleetDevice, a dict with host/port/device_id, a (host, port[, device_id]) tuple or 'host:port'."""
+        if isinstance(spec, FleetDevice):
+            return spec
+        if isinstance(spec, dict):
+            host = spec["host"]
+            port = spec.get("port", 80)
+            return cls(spec.get("device_id") or f"{host}:{port}", host, port)
+        if isinstance(spec, str):
+            host, _, port = spec.partition(":")
+            return cls(spec, host, port or 80)
+        host, port, *rest = spec
+        return cls(rest[0] if rest else f"{host}:{port}", host, port)
+
+    def stats(self, duration: float) -> Dict:
+        latencies = np.array([s[1] for s in self.samples], dtype=float) * 1000
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if latencies.size else (np.nan,) * 3
+        return {
+            "samples": len(self.samples),
+            "rate": len(self.samples) / duration if duration > 0 else 0.0,
+            "latency_ms_p50": float(p50),
+            "latency_ms_p90": float(p90),
+            "latency_ms_p99": float(p99),
+            "errors": self.errors,
+            "missed": self.missed,
+        }
+
+
+class FleetPoller:
+    """
+    Polls ``adc`` on many boards concurrently at a common rate.
+
+    Every device runs its own coroutine on one event loop against shared absolute deadlines,
+    so a cycle costs one round trip of the slowest board regardless of how many boards there are.
+    Samples are tagged with the host timestamp at the middle of the request.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[Union[FleetDevice, Dict, Tuple, str]],
+        rate: float = 10,
+        timeout: float = 2,
+        reconnect_delay: float = 1,
+    ):
+        self.devices = [FleetDevice.from_spec(device) for device in devices]
+        if not self.devices:
+            raise ValueError("Fleet is empty")
+        self.rate = float(rate)
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop: Optional[asyncio.Event] = None
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    async def _poll_device(self, device: FleetDevice, t0: float, deadline: float, on_sample: Callable = None):
+        period = 1 / self.rate
+        tick = 0
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            try:
+                async with AsyncEspAdc(host=device.host, port=device.port, timeout=self.timeout) as daq:
+                    while not self._stop.is_set():
+                        target = t0 + tick * period
+                        if target >= deadline:
+                            return
+                        delay = target - time.perf_counter()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        sent = time.perf_counter()
+                        data = await daq.read_data()
+                        received = time.perf_counter()
+                        # пропущенные из-за медленного ответа такты не догоняем
+                        next_tick = int((received - t0) / period) + 1
+                        device.missed += max(next_tick - tick - 1, 0)
+                        tick = next_tick
+                        if data is None:
+                            device.errors += 1
+                            continue
+                        sample = (self.started + (sent + received) / 2 - t0, received - sent, *data)
+                        device.samples.append(sample)
+                        if callable(on_sample):
+                            on_sample(device.device_id, sample)
+            except (OSError, asyncio.TimeoutError, DeviceConnectionError) as e:
+                device.errors += 1
+                logger.debug(f"[{self.__class__.__name__}._poll_device] {device.device_id}: {e}")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.reconnect_delay)
+                except asyncio.TimeoutError:
+                    pass
+                tick = int((time.perf_counter() - t0) / period) + 1
+
+    async def run_async(self, duration: float, on_sample: Callable = None) -> Dict[str, Dict]:
+        """Poll for ``duration`` seconds (or until ``stop()``); ``on_sample(device_id, sample)`` is optional."""
+        self._stop = asyncio.Event()
+        for device in self.devices:
+            device.samples.clear()
+            device.errors = device.missed = 0
+        self.started = time.time()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(self._poll_device(d, t0, t0 + duration, on_sample) for d in self.devices))
+        self.duration = time.perf_counter() - t0
+        return self.stats()
+
+    def run(self, duration: float, on_sample: Callable = None) -> Dict[str, Dict]:
+        return asyncio.run(self.run_async(duration, on_sample=on_sample))
+
+    def stats(self) -> Dict[str, Dict]:
+        return {device.device_id: device.stats(self.duration) for device in self.devices}
+
+    def merged(self) -> List[Tuple[str, float, float, float, float]]:
+        """All samples as one time-ordered stream of (device_id, host_time, a0, a1, a2)."""
+        stream = [(d.device_id, s[0], s[2], s[3], s[4]) for d in self.devices for s in d.samples]
+        stream.sort(key=lambda item: item[1])
+        return stream
+
+    def arrays(self) -> Dict[str, Dict]:
+        """Per-device arrays in the ``MeasureModel.data`` layout: time, rps and data[channel]."""
+        result = {}
+        for device in self.devices:
+            samples = np.array(device.samples, dtype=float).reshape(-1, 5)
+            result[device.device_id] = {
+                "time": samples[:, 0] - self.started,
+                "rps": self.rate,
+                "data": {1: samples[:, 2], 2: samples[:, 3], 3: samples[:, 4]},
+            }
+        return result
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+from api.constants import SOCKET
+from api.download import read_offset, remove_partial, write_offset
+from api.esp_adc import EspAdc
+from api.exceptions import DeviceCloseError, DeviceConnectionError, DeviceProtocolError
+from api.fleet import FleetDevice
+
+logger = logging.getLogger(__name__)
+
+SKIP_PREFIXES = ("SYSTEM~", "FSEVE~", "SPOTL~", "TRASH~")
+
+NEW = "new"
+GROWN = "grown"
+REPLACED = "replaced"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+
+class SdMirror:
+    """
+    Incremental copy of one board's SD card into ``<root>/<device_id>``.
+
+    ``manifest.json`` in that folder keeps the size and the time of the last sync of every file.
+    New files are downloaded whole, a file that grew since the last sync (the active recording)
+    is resumed from the synced size, so only the appended tail is transferred.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(
+        self,
+        device: Union[FleetDevice, Dict, Tuple, str],
+        root: str,
+        chunk_size: int = 256 * 1024,
+        retries: int = 5,
+        timeout: float = 10,
+    ):
+        self.device = FleetDevice.from_spec(device)
+        self.folder = os.path.join(root, self.device.device_id.replace(":", "_"))
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        self.manifest: Dict[str, Dict] = self.load_manifest()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.folder, self.MANIFEST)
+
+    def load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f).get("files", {})
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.warning(f"[{self.__class__.__name__}.load_manifest] {self.manifest_path} is damaged: {e}")
+            return {}
+
+    def save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "device": self.device.device_id,
+                    "host": self.device.host,
+                    "port": self.device.port,
+                    "files": self.manifest,
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.manifest_path)
+
+    def local_path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def plan(self, files: List[Dict]) -> List[Tuple[str, int, str, int]]:
+        """``(name, size, action, offset)`` for every file of the ``EspAdc.get_files`` listing."""
+        result = []
+        for info in files:
+            name, size = info.get("name"), info.get("size", -1)
+            if (
+                not name
+                or name.startswith(".")
+                or name == "System Volume Information"
+                or name.startswith(SKIP_PREFIXES)
+            ):
+                continue
+            local = self.local_path(name)
+            local_size = os.path.getsize(local) if os.path.isfile(local) else -1
+            entry = self.manifest.get(name)
+            if entry is None or local_size < 0 or local_size != entry.get("size"):
+                # незавершённая прошлая загрузка (.part) будет продолжена самим download_file
+                result.append((name, size, NEW, 0))
+            elif 0 <= size < local_size:
+                result.append((name, size, REPLACED, 0))
+            elif size == local_size:
+                result.append((name, size, UNCHANGED, local_size))
+            else:
+                # размер неизвестен (-1) — тоже докачиваем: при совпадении придёт пустой хвост
+                result.append((name, size, GROWN, local_size))
+        return result
+
+    def sync(self, on_progress: Callable = None) -> Dict:
+        """
+        Bring the local copy up to date over one connection.
+        ``on_progress(device_id, name, downloaded, total)`` is optional. Returns counters of the actions taken.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        summary = {"device": self.device.device_id, NEW: 0, GROWN: 0, REPLACED: 0, UNCHANGED: 0, FAILED: 0}
+        summary.update(bytes=0, seconds=0.0, error="")
+        start = time.perf_counter()
+        try:
+            with EspAdc(host=self.device.host, port=self.device.port, adapter=SOCKET, timeout=self.timeout) as daq:
+                listing = daq.query("files")
+                if listing.startswith("Error"):
+                    # например, карта не смонтирована: это ошибка устройства, а не файла
+                    raise DeviceProtocolError(listing)
+                for name, size, action, offset in self.plan(daq.parse_files(listing)):
+                    if action == UNCHANGED:
+                        summary[UNCHANGED] += 1
+                        continue
+                    ok, received = self._fetch(daq, name, action, offset, on_progress)
+                    summary[action if ok else FAILED] += 1
+                    summary["bytes"] += received
+                    # прошивка закрывает соединение после hostFile
+                    daq.reconnect()
+        except (OSError, DeviceConnectionError, DeviceCloseError, DeviceProtocolError) as e:
+            summary["error"] = str(e) or e.__class__.__name__
+            logger.error(f"[{self.__class__.__name__}.sync] {self.device.device_id}: {summary['error']}")
+        summary["seconds"] = time.perf_counter() - start
+        return summary
+
+    def _fetch(self, daq: EspAdc, name: str, action: str, offset: int, on_progress: Callable = None):
+        local = self.local_path(name)
+        part_path = local + ".part"
+        if action == GROWN:
+            # полная копия становится частичной загрузкой, download_file докачает её с offset
+            os.replace(local, part_path)
+            write_offset(part_path, offset)
+        progress = None
+        if callable(on_progress):
+
+            def progress(downloaded: int, total: int):
+                on_progress(self.device.device_id, name, downloaded, total)
+
+        ok, msg = daq.download_file(
+            name, on_progress=progress, chunk_size=self.chunk_size, dest_path=local, retries=self.retries
+        )
+        stats = daq.last_download
+        received = stats.received if stats is not None else 0
+        if not ok:
+            logger.warning(f"[{self.__class__.__name__}._fetch] {self.device.device_id}/{name}: {msg}")
+            if action == GROWN:
+                self._restore_partial(name)
+            return False, received
+        self.manifest[name] = {"size": stats.total_size, "synced": time.time()}
+        self.save_manifest()
+        logger.info(f"[{self.__class__.__name__}._fetch] {self.device.device_id}/{name}: {action}, {msg}")
+        return True, received
+
+    def _restore_partial(self, name: str):
+        """Failed tail fetch: keep the received prefix as the local copy so the next sync continues from it."""
+        local = self.local_path(name)
+        part_path = local + ".part"
+        if not os.path.isfile(part_path):
+            return
+        offset = read_offset(part_path)
+        with open(part_path, "r+b") as f:
+            f.truncate(offset)
+        os.replace(part_path, local)
+        remove_partial(part_path)
+        self.manifest[name] = {"size": offset, "synced": time.time()}
+        self.save_manifest()
+
+
+def mirror_devices(
+    devices: Iterable[Union[FleetDevice, Dict, Tuple, str]],
+    root: str,
+    on_progress: Callable = None,
+    max_workers: int = None,
+    **kwargs,
+) -> List[Dict]:
+    """Sync several boards at once: every board is served by its own thread and its single connection."""
+    mirrors = [SdMirror(device, root, **kwargs) for device in devices]
+    if not mirrors:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(mirrors)) as pool:
+        return list(pool.map(lambda mirror: mirror.sync(on_progress), mirrors))
@@ -0,0 +1,62 @@
+import struct
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from api.constants import GAIN_LSB_MV
+
+# Бинарный формат отсчётов (включается командой ``format=bin`` на время соединения).
+# Кадр: заголовок <2sBBHI> — magic, версия, индекс усиления, число записей, seq следующего отсчёта,
+# затем ``count`` записей <IIhhh> — seq, timestamp_ms и сырые коды АЦП трёх каналов.
+FRAME_MAGIC = b"\xad\xc0"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<2sBBHI")
+FRAME_RECORD = struct.Struct("<IIhhh")
+RECORD_DTYPE = np.dtype([("seq", "<u4"), ("ts", "<u4"), ("raw", "<i2", (3,))])
+
+assert RECORD_DTYPE.itemsize == FRAME_RECORD.size
+
+
+class FrameHeader:
+    __slots__ = ("version", "gain", "count", "head")
+
+    def __init__(self, version: int, gain: int, count: int, head: int):
+        self.version = version
+        self.gain = gain
+        self.count = count
+        self.head = head
+
+    @property
+    def payload_size(self) -> int:
+        return self.count * RECORD_DTYPE.itemsize
+
+
+def parse_header(data: bytes) -> FrameHeader:
+    magic, version, gain, count, head = FRAME_HEADER.unpack(data)
+    if magic != FRAME_MAGIC:
+        raise ValueError(f"Bad frame magic {magic!r}")
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version {version}")
+    if gain not in GAIN_LSB_MV:
+        raise ValueError(f"Unknown gain index {gain}")
+    return FrameHeader(version, gain, count, head)
+
+
+def decode_records(payload: bytes) -> np.ndarray:
+    """Records of one frame as a structured array with ``seq``, ``ts`` and ``raw`` (n x 3 int16) fields."""
+    return np.frombuffer(payload, dtype=RECORD_DTYPE)
+
+
+def to_mv(records: np.ndarray, gain: int) -> np.ndarray:
+    """Raw counts to millivolts, n x 3 float64."""
+    return records["raw"] * GAIN_LSB_MV[gain]
+
+
+def encode_frame(records: Iterable[Tuple[int, int, int, int, int]], gain: int, head: int) -> bytes:
+    records = list(records)
+    body = b"".join(FRAME_RECORD.pack(*record) for record in records)
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, gain, len(records), head) + body
+
+
+def mv_to_raw(value: float, gain: int) -> int:
+    return max(-32768, min(32767, int(round(value / GAIN_LSB_MV[gain]))))
@@ -0,0 +1,82 @@
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+SKIP = "skip"
+CATCH_UP = "catch_up"
+POLICIES = (SKIP, CATCH_UP)
+
+
+class DeadlineScheduler:
+    """
+    Fixed-rate pacing on absolute deadlines of the monotonic ``time.perf_counter`` clock.
+
+    ``wait()`` sleeps until the next deadline ``start + n / rate``, so the time spent between the calls (the query
+    itself) does not add up and the rate does not drift. When a call overruns past the next deadlines, the policy
+    decides: ``SKIP`` drops the missed deadlines and keeps the grid, ``CATCH_UP`` serves them back to back
+    (at most ``max_burst`` of them, the rest is dropped). Lateness of every tick is kept for jitter statistics.
+    """
+
+    JITTER_WINDOW = 10000
+
+    def __init__(self, rate: float, policy: str = SKIP, max_burst: int = 10):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}', expected one of {POLICIES}")
+        self.rate = float(rate)
+        self.period = 1 / self.rate
+        self.policy = policy
+        self.max_burst = max_burst
+        self.started: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.ticks = 0
+        # опоздание больше периода: отсчёт взят уже в чужом слоте
+        self.late = 0
+        self.skipped = 0
+        self.lateness = deque(maxlen=self.JITTER_WINDOW)
+
+    def wait(self) -> float:
+        """Block until the next deadline; returns the lateness of this tick in seconds."""
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.started = self.deadline = now
+        elif self.deadline > now:
+            time.sleep(self.deadline - now)
+            now = time.perf_counter()
+        lateness = now - self.deadline
+        self.lateness.append(lateness)
+        self.ticks += 1
+        if lateness > self.period:
+            self.late += 1
+        self.deadline += self.period
+        if now > self.deadline:
+            # просроченные сроки: SKIP переходит к ближайшему будущему, CATCH_UP отрабатывает часть подряд
+            overdue = int((now - self.deadline) / self.period) + 1
+            dropped = overdue if self.policy == SKIP else max(overdue - self.max_burst, 0)
+            self.skipped += dropped
+            self.deadline += dropped * self.period
+        return lateness
+
+    def stats(self) -> Dict:
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        lateness = np.fromiter(self.lateness, dtype=float, count=len(self.lateness)) * 1000
+        if len(lateness):
+            p50, p95, p99 = np.percentile(lateness, (50, 95, 99))
+            worst = lateness.max()
+        else:
+            p50 = p95 = p99 = worst = 0.0
+        return {
+            "target_rps": self.rate,
+            "poll_rate": self.ticks / elapsed if elapsed > 0 else 0.0,
+            "polls": self.ticks,
+            "jitter_p50_ms": float(p50),
+            "jitter_p95_ms": float(p95),
+            "jitter_p99_ms": float(p99),
+            "jitter_max_ms": float(worst),
+            "late_polls": self.late,
+            "skipped_polls": self.skipped,
+            "policy": self.policy,
+        }
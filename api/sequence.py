@@ -0,0 +1,80 @@
+import time
+from typing import Dict, Optional
+
+
+class SequenceTracker:
+    """
+    Duplicate and gap accounting for samples numbered by the device (``seq`` of ``DataPoint``).
+
+    Polling ``adc`` faster than the firmware produces samples returns the same sample again, polling slower
+    skips samples. ``accept(seq, ts)`` tells whether a sample is new and counts both cases, so the effective
+    rate can be compared with the device rate (``device_rate``, from the device timestamps) and the poll rate tuned.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.duplicates = 0
+        self.gaps = 0
+        self.missed = 0
+        self.restarts = 0
+        self.last_seq: Optional[int] = None
+        self.first_ts: Optional[int] = None
+        self.last_ts: Optional[int] = None
+        self.first_seq: Optional[int] = None
+        self.started: Optional[float] = None
+        # время устройства до последнего перезапуска, мс: после перезапуска его часы снова идут с нуля
+        self.ts_offset = 0
+        self.last_step = 0
+
+    def accept(self, seq: Optional[int], ts: Optional[int] = None) -> bool:
+        """Register a sample; False if it is a duplicate of the previous one."""
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        if seq is None:
+            # прошивка без номеров отсчётов: дубликаты не отличить
+            self.samples += 1
+            return True
+        if self.last_seq is not None:
+            if seq == self.last_seq:
+                self.duplicates += 1
+                return False
+            if seq < self.last_seq:
+                # устройство перезапустилось и начало нумерацию заново
+                self.restarts += 1
+                if self.last_ts is not None and self.first_ts is not None:
+                    self.ts_offset += self.last_ts - self.first_ts + self.last_step
+                self.first_seq, self.first_ts = seq, ts
+            elif seq > self.last_seq + 1:
+                self.gaps += 1
+                self.missed += seq - self.last_seq - 1
+            elif ts is not None and self.last_ts is not None:
+                # шаг между соседними отсчётами: на столько же сдвигается первый отсчёт после перезапуска
+                self.last_step = max(ts - self.last_ts, 1)
+        else:
+            self.first_seq, self.first_ts = seq, ts
+        self.last_seq = seq
+        self.last_ts = ts
+        self.samples += 1
+        return True
+
+    def elapsed(self, ts: int) -> float:
+        """Seconds from the first sample by the device clock, continued across device restarts."""
+        return (self.ts_offset + ts - self.first_ts) / 1000
+
+    def stats(self) -> Dict:
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        polled = self.samples + self.duplicates
+        device_rate = 0.0
+        if self.last_ts is not None and self.first_ts is not None and self.last_ts > self.first_ts:
+            device_rate = (self.last_seq - self.first_seq) / (self.last_ts - self.first_ts) * 1000
+        return {
+            "samples": self.samples,
+            "rate": self.samples / elapsed if elapsed > 0 else 0.0,
+            "device_rate": device_rate,
+            "duplicates": self.duplicates,
+            "duplicate_ratio": self.duplicates / polled if polled else 0.0,
+            "gaps": self.gaps,
+            "missed": self.missed,
+            "restarts": self.restarts,
+        }
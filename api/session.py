@@ -0,0 +1,149 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple, Union, Type
+
+from api.base import BaseInstrument
+from api.esp_adc import EspAdc
+from api.exceptions import DeviceConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceSession:
+    """
+    Long-lived connection to one device shared by all callers.
+
+    The firmware serves a single client at a time, so callers are serialized by a lock.
+    Dead connections are detected with ``is_socket_closed`` and reopened transparently.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: Union[str, int],
+        adapter: str,
+        instrument_class: Type[BaseInstrument] = EspAdc,
+        **kwargs,
+    ):
+        self.host = host
+        self.port = port
+        self.adapter = adapter
+        self.instrument_class = instrument_class
+        self.kwargs = kwargs
+        self.instrument = None
+        self.lock = threading.RLock()
+        self.connects = 0
+        self.reuses = 0
+        self.reconnects = 0
+        self.errors = 0
+
+    def _is_alive(self) -> bool:
+        if self.instrument is None or self.instrument.adapter is None:
+            return False
+        check = getattr(self.instrument.adapter, "is_socket_closed", None)
+        if not callable(check):
+            return True
+        return check() is False
+
+    def _connect(self) -> BaseInstrument:
+        if self.instrument is not None:
+            self.reconnects += 1
+            self._drop()
+        instrument = self.instrument_class(host=self.host, port=self.port, adapter=self.adapter, **self.kwargs)
+        instrument.__enter__()
+        self.instrument = instrument
+        self.connects += 1
+        logger.debug(f"[{self.__class__.__name__}._connect] Connected to {self.host}:{self.port}")
+        return instrument
+
+    def _drop(self) -> None:
+        instrument, self.instrument = self.instrument, None
+        if instrument is None:
+            return
+        try:
+            instrument.close()
+        except OSError as e:
+            logger.debug(f"[{self.__class__.__name__}._drop] {e}")
+
+    @contextmanager
+    def acquire(self, timeout: float = 10):
+        """Yield a connected instrument, holding the session lock until the block exits."""
+        if not self.lock.acquire(timeout=timeout):
+            raise DeviceConnectionError(f"Device {self.host}:{self.port} is busy")
+        try:
+            if self._is_alive():
+                self.reuses += 1
+                instrument = self.instrument
+            else:
+                instrument = self._connect()
+            try:
+                yield instrument
+            except (OSError, DeviceConnectionError):
+                self.errors += 1
+                self._drop()
+                raise
+        finally:
+            self.lock.release()
+
+    def close(self) -> None:
+        with self.lock:
+            self._drop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connects": self.connects,
+            "reuses": self.reuses,
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+        }
+
+
+class SessionManager:
+    _sessions: Dict[Tuple[str, str, str], DeviceSession] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _key(host: str, port: Union[str, int], adapter: str) -> Tuple[str, str, str]:
+        return host, str(port), adapter
+
+    @classmethod
+    def get(cls, host: str, port: Union[str, int], adapter: str, **kwargs) -> DeviceSession:
+        key = cls._key(host, port, adapter)
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = DeviceSession(host=host, port=port, adapter=adapter, **kwargs)
+                cls._sessions[key] = session
+            return session
+
+    @classmethod
+    def find(cls, host: str, port: Union[str, int], adapter: str) -> Optional[DeviceSession]:
+        """Existing session to the device, None if nobody has opened one."""
+        with cls._lock:
+            return cls._sessions.get(cls._key(host, port, adapter))
+
+    @classmethod
+    def session(cls, host: str, port: Union[str, int], adapter: str, timeout: float = 10, **kwargs):
+        """Shortcut for ``SessionManager.get(...).acquire()``, usable in place of ``with EspAdc(...)``."""
+        return cls.get(host, port, adapter, **kwargs).acquire(timeout=timeout)
+
+    @classmethod
+    def close(cls, host: str, port: Union[str, int], adapter: str) -> None:
+        with cls._lock:
+            session = cls._sessions.pop(cls._key(host, port, adapter), None)
+        if session is not None:
+            session.close()
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._lock:
+            sessions = list(cls._sessions.values())
+            cls._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, int]]:
+        with cls._lock:
+            return {f"{host}:{port} ({adapter})": s.stats() for (host, port, adapter), s in cls._sessions.items()}
@@ -0,0 +1,652 @@
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import select
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from api.constants import FORMATS, GAINS
+from api.protocol import encode_frame, mv_to_raw
+
+logger = logging.getLogger(__name__)
+
+RT_BUFFER_SIZE = 256
+SD_BUFFER_SIZE = 860
+CHUNK_SIZE = 16384
+MAX_FILENAME_LEN = 32
+GAIN_FULL_SCALE_MV = {0: 6144.0, 1: 4096.0, 2: 2048.0, 3: 1024.0, 4: 512.0, 5: 256.0}
+GAIN_ALIASES = {
+    "2/3": 0,
+    "0.666": 0,
+    "0.667": 0,
+    "1x": 1,
+    "4.096": 1,
+    "2x": 2,
+    "2.048": 2,
+    "4": 3,
+    "4x": 3,
+    "1.024": 3,
+    "8": 4,
+    "8x": 4,
+    "0.512": 4,
+    "16": 5,
+    "16x": 5,
+    "0.256": 5,
+}
+FILENAME_CHARS_RE = re.compile(r"[^a-zA-Z0-9_.\-]")
+
+
+def sanitize_filename(name: str) -> str:
+    out = FILENAME_CHARS_RE.sub("", name)
+    if not out:
+        out = datetime.now().strftime("data_%Y%m%d_%H%M%S.txt")
+    return out[:MAX_FILENAME_LEN]
+
+
+def is_valid_filename(name: str) -> bool:
+    return bool(name) and len(name) <= MAX_FILENAME_LEN and sanitize_filename(name) == name
+
+
+class SimDataPoint:
+    __slots__ = ("seq", "timestamp_ms", "adc0", "adc1", "adc2")
+
+    def __init__(self, seq: int, timestamp_ms: int, adc0: float, adc1: float, adc2: float):
+        self.seq = seq
+        self.timestamp_ms = timestamp_ms
+        self.adc0 = adc0
+        self.adc1 = adc1
+        self.adc2 = adc2
+
+
+class EspAdcSimulator:
+    """
+    Pure-Python stand-in for the ESP ADC firmware (esp_adc/main/main.cpp).
+
+    Speaks the same line protocol on one TCP port, including ``hostFile=`` and the HTTP
+    ``GET /files`` and ``GET /download?file=`` endpoints, generates synthetic waveforms at ``rate`` Hz
+    and keeps the SD card in a temporary directory. Network faults can be injected:
+
+    * ``latency`` - seconds added before every reply;
+    * ``bandwidth`` - bytes/s cap for everything the device sends;
+    * ``drop_probability`` - chance that a command closes the connection instead of replying;
+    * ``single_client`` - serve one client at a time like the firmware (others wait in the backlog);
+    * ``transfer_limit`` - close the connection after this many file bytes of every download.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate: float = 100,
+        sd_dir: str = None,
+        latency: float = 0.0,
+        bandwidth: float = None,
+        drop_probability: float = 0.0,
+        single_client: bool = True,
+        gain: int = 1,
+        seed: int = None,
+        transfer_limit: int = None,
+    ):
+        self.host = host
+        self.port = port
+        self.rate = float(rate)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.drop_probability = drop_probability
+        self.single_client = single_client
+        self.transfer_limit = transfer_limit
+        self.gain = gain
+        self.random = random.Random(seed)
+
+        self._own_sd_dir = sd_dir is None
+        self.sd_dir = sd_dir or tempfile.mkdtemp(prefix="esp_adc_sd_")
+        self.sd_mounted = True
+        self.is_recording = False
+        self.current_file_name = ""
+        self.sd_buffer: List[SimDataPoint] = []
+        self.sd_lock = threading.RLock()
+
+        self.rt_buffer: List[Optional[SimDataPoint]] = [None] * RT_BUFFER_SIZE
+        self.rt_seq = 0  # количество сгенерированных отсчётов, seq последнего = rt_seq - 1
+        self.rt_lock = threading.Condition()
+
+        self.started = time.monotonic()
+        self.listen_sock: socket.socket = None
+        self.running = False
+        self.threads: List[threading.Thread] = []
+        self.clients_served = 0
+        self.commands_served = 0
+
+    # ------------------------------------------------------------------ lifecycle
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.host, self.port
+
+    def start(self) -> "EspAdcSimulator":
+        self.listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listen_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listen_sock.bind((self.host, self.port))
+        self.listen_sock.listen(1 if self.single_client else 16)
+        self.listen_sock.settimeout(0.2)
+        self.port = self.listen_sock.getsockname()[1]
+        self.running = True
+        self.started = time.monotonic()
+        for target in (self._sampling_loop, self._accept_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"[{self.__class__.__name__}.start] Listening on {self.host}:{self.port}, SD in {self.sd_dir}")
+        return self
+
+    def stop(self):
+        self.running = False
+        with self.rt_lock:
+            self.rt_lock.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads.clear()
+        if self.listen_sock is not None:
+            self.listen_sock.close()
+            self.listen_sock = None
+        if self._own_sd_dir:
+            shutil.rmtree(self.sd_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # ------------------------------------------------------------------ acquisition
+    def _millis(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+    def waveform(self, t: float) -> Tuple[float, float, float]:
+        """Synthetic channels in mV: 1 Hz sine, 0.2 Hz triangle and noisy DC, clipped to the gain range."""
+        full_scale = GAIN_FULL_SCALE_MV[self.gain]
+        lsb = full_scale / 32768.0
+        a0 = 0.5 * full_scale * math.sin(2 * math.pi * t)
+        a1 = full_scale * (2 * abs(2 * ((0.2 * t) % 1) - 1) - 1) * 0.8
+        a2 = 0.1 * full_scale + self.random.gauss(0, 0.01 * full_scale)
+        return tuple(round(max(-full_scale, min(full_scale - lsb, v)) / lsb) * lsb for v in (a0, a1, a2))
+
+    def _push_sample(self):
+        ts = self._millis()
+        with self.rt_lock:
+            dp = SimDataPoint(self.rt_seq, ts, *self.waveform(ts / 1000))
+            self.rt_buffer[self.rt_seq % RT_BUFFER_SIZE] = dp
+            self.rt_seq += 1
+            self.rt_lock.notify_all()
+        if self.is_recording and self.sd_mounted:
+            with self.sd_lock:
+                self.sd_buffer.append(dp)
+                full = len(self.sd_buffer) >= SD_BUFFER_SIZE
+            if full:
+                self.flush_buffer_to_sd()
+
+    def _sampling_loop(self):
+        period = 1 / self.rate
+        next_tick = time.monotonic()
+        while self.running:
+            self._push_sample()
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -1:
+                next_tick = time.monotonic()
+
+    def latest(self) -> Optional[SimDataPoint]:
+        with self.rt_lock:
+            if self.rt_seq == 0:
+                return None
+            return self.rt_buffer[(self.rt_seq - 1) % RT_BUFFER_SIZE]
+
+    def copy_since(self, from_seq: int, max_count: int = RT_BUFFER_SIZE) -> Tuple[List[SimDataPoint], int]:
+        """Samples with seq >= from_seq still held in the ring buffer, and the current head (next seq)."""
+        with self.rt_lock:
+            head = self.rt_seq
+            from_seq = min(max(from_seq, head - RT_BUFFER_SIZE, 0), head)
+            count = min(head - from_seq, max_count)
+            return [self.rt_buffer[seq % RT_BUFFER_SIZE] for seq in range(from_seq, from_seq + count)], head
+
+    def read_adc_pretty(self) -> str:
+        dp = self.latest()
+        if dp is None:
+            return "ADS1115 not ready"
+        return (
+            f"ADC0: {dp.adc0:.1f} mV; ADC1: {dp.adc1:.1f} mV; ADC2: {dp.adc2:.1f} mV; "
+            f"TS: {dp.timestamp_ms} ms; SEQ: {dp.seq};"
+        )
+
+    def encode_samples(self, samples: List[SimDataPoint], head: int) -> bytes:
+        """Binary frame as sent by the firmware in ``format=bin`` mode."""
+        gain = self.gain
+        return encode_frame(
+            (
+                (dp.seq, dp.timestamp_ms, mv_to_raw(dp.adc0, gain), mv_to_raw(dp.adc1, gain), mv_to_raw(dp.adc2, gain))
+                for dp in samples
+            ),
+            gain,
+            head,
+        )
+
+    def read_adc_since(self, from_seq: int) -> str:
+        samples, head = self.copy_since(from_seq)
+        if not head:
+            return "ADS1115 not ready"
+        items = "".join(f"{dp.seq},{dp.timestamp_ms},{dp.adc0:.1f},{dp.adc1:.1f},{dp.adc2:.1f};" for dp in samples)
+        return f"HEAD {head};{items}"
+
+    def read_since_binary(self, from_seq: int) -> bytes:
+        samples, head = self.copy_since(from_seq)
+        if not head:
+            return b"ADS1115 not ready\n"
+        return self.encode_samples(samples, head)
+
+    @staticmethod
+    def parse_since_seq(command: str) -> int:
+        value = command.strip()[9:]
+        return int(value) if value.isdigit() else 0
+
+    def read_adc_binary(self) -> bytes:
+        with self.rt_lock:
+            head = self.rt_seq
+        dp = self.latest()
+        if dp is None:
+            return b"ADS1115 not ready\n"
+        return self.encode_samples([dp], head)
+
+    # ------------------------------------------------------------------ SD card
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.sd_dir, file_name)
+
+    def flush_buffer_to_sd(self):
+        with self.sd_lock:
+            if not self.sd_mounted or not self.current_file_name or not self.sd_buffer:
+                self.sd_buffer.clear()
+                return
+            lines = "".join(
+                f"{dp.timestamp_ms}; {dp.adc0:.1f}; {dp.adc1:.1f}; {dp.adc2:.1f}\n" for dp in self.sd_buffer
+            )
+            with open(self._path(self.current_file_name), "a") as f:
+                f.write(lines)
+            self.sd_buffer.clear()
+
+    def list_files_info(self) -> List[Tuple[str, int]]:
+        if not self.sd_mounted:
+            return []
+        files = []
+        for name in sorted(os.listdir(self.sd_dir)):
+            path = self._path(name)
+            if name.startswith(".") or not is_valid_filename(name) or not os.path.isfile(path):
+                continue
+            files.append((name, os.path.getsize(path)))
+        return files
+
+    def list_files(self) -> str:
+        if not self.sd_mounted:
+            return "Error: SD card not initialized"
+        return "".join(f"{name}:{size};" for name, size in self.list_files_info())
+
+    def delete_file(self, file_name: str) -> str:
+        if not self.sd_mounted:
+            return "Error: SD card not initialized."
+        if not file_name:
+            return "Error: Empty file name"
+        if self.is_recording and self.current_file_name == file_name:
+            return "Error: Unable delete current recording file!"
+        path = self._path(file_name.lstrip("/"))
+        if os.path.isfile(path):
+            try:
+                os.unlink(path)
+            except OSError:
+                return "Error: Failed to delete " + file_name
+            return "File " + file_name + " deleted"
+        return "Error: File " + file_name + " not found"
+
+    # ------------------------------------------------------------------ commands
+    def process_request(self, raw_command: str) -> str:
+        command = raw_command.strip()
+        if command == "adc":
+            return self.read_adc_pretty()
+        if command.startswith("adcSince="):
+            return self.read_adc_since(self.parse_since_seq(command))
+        if command == "ip":
+            return self.host
+        if command == "adsGain":
+            return str(self.gain)
+        if command.startswith("adsGain="):
+            value = command[8:].strip()
+            gain = int(value) if value.isdigit() else GAIN_ALIASES.get(value)
+            if gain not in GAINS:
+                return f"Error: Invalid gain value '{value}'. Use index 0..5 or 2/3,1,2,4,8,16"
+            self.gain = gain
+            return str(gain)
+        if command.startswith("wifi="):
+            if self.is_recording:
+                return "Error: Unable setup wifi during recording!"
+            return "Restarting to apply WiFi settings"
+        if command.startswith("start="):
+            if not self.sd_mounted:
+                return "Error: SD card not initialized."
+            if self.is_recording:
+                return "Error: Unable to start new recording due to " + self.current_file_name
+            name = command[6:].strip()
+            if not name or name == "/":
+                name = ""
+            name = sanitize_filename(name.rsplit("/", 1)[-1])
+            self.current_file_name = name
+            self.is_recording = True
+            return "Recording started in " + name
+        if command == "stop":
+            self.is_recording = False
+            self.flush_buffer_to_sd()
+            response = "Recording stopped in " + self.current_file_name
+            self.current_file_name = ""
+            return response
+        if command.startswith("delete="):
+            return self.delete_file(command[7:])
+        if command == "files":
+            return self.list_files()
+        if command == "checkRecording":
+            return ("Recording to " + self.current_file_name) if self.is_recording else "Not recording"
+        if command == "deinitSD":
+            if self.sd_mounted:
+                if self.is_recording:
+                    self.is_recording = False
+                    self.flush_buffer_to_sd()
+                self.sd_mounted = False
+                return "SD card deinitialized. Safe to remove."
+            return "SD card is already deinitialized."
+        if command == "initSD":
+            if not self.sd_mounted:
+                self.sd_mounted = True
+                return "SD card initialized."
+            return "SD card is already initialized."
+        return "command not found"
+
+    # ------------------------------------------------------------------ network
+    def _send(self, sock: socket.socket, data: bytes):
+        if not self.bandwidth:
+            sock.sendall(data)
+            return
+        step = max(int(self.bandwidth / 50), 1)
+        for i in range(0, len(data), step):
+            started = time.monotonic()
+            sock.sendall(data[i : i + step])
+            delay = len(data[i : i + step]) / self.bandwidth - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    def send_file(self, sock: socket.socket, file_name: str, http_mode: bool, offset: int = 0):
+        def error(http_status: str, body: str, text: str, extra_headers: str = ""):
+            if http_mode:
+                msg = (
+                    f"HTTP/1.1 {http_status}\r\nContent-Type: text/plain\r\n{extra_headers}"
+                    f"Content-Length: {len(body)}\r\n\r\n{body}"
+                )
+            else:
+                msg = text + "\n"
+            self._send(sock, msg.encode())
+
+        if not self.sd_mounted:
+            return error("503 Service Unavailable", "SD not mounted", "Error: SD not mounted")
+        if not is_valid_filename(file_name):
+            return error("400 Bad Request", "Invalid filename", "Error: Invalid filename")
+        if self.is_recording and self.current_file_name == file_name:
+            self.flush_buffer_to_sd()
+        path = self._path(file_name)
+        if not os.path.isfile(path):
+            return error("404 Not Found", "Not found", "Error: File not found")
+        size = os.path.getsize(path)
+        if offset < 0 or offset > size or (http_mode and 0 < offset == size):
+            return error(
+                "416 Range Not Satisfiable", "", "Error: Invalid offset", f"Content-Range: bytes */{size}\r\n"
+            )
+        if http_mode and offset:
+            header = (
+                "HTTP/1.1 206 Partial Content\r\n"
+                "Content-Type: application/octet-stream\r\n"
+                f"Content-Length: {size - offset}\r\n"
+                f"Content-Range: bytes {offset}-{size - 1}/{size}\r\n"
+                "Accept-Ranges: bytes\r\n"
+                f'Content-Disposition: attachment; filename="{file_name}"\r\n'
+                "\r\n"
+            )
+        elif http_mode:
+            header = (
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: application/octet-stream\r\n"
+                f"Content-Length: {size}\r\n"
+                "Accept-Ranges: bytes\r\n"
+                f'Content-Disposition: attachment; filename="{file_name}"\r\n'
+                "\r\n"
+            )
+        else:
+            header = f"SIZE {size} OFFSET {offset}\n"
+        self._send(sock, header.encode())
+        with open(path, "rb") as f:
+            f.seek(offset)
+            remaining = size - offset
+            limit = self.transfer_limit
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining, limit if limit is not None else CHUNK_SIZE))
+                if not chunk:
+                    break
+                self._send(sock, chunk)
+                remaining -= len(chunk)
+                if limit is not None:
+                    limit -= len(chunk)
+                    if limit <= 0 and remaining > 0:
+                        logger.debug(f"[{self.__class__.__name__}.send_file] Transfer cut at {size - remaining}")
+                        return
+
+    def host_file(self, sock: socket.socket, argument: str):
+        """``hostFile=<name>`` or ``hostFile=<name>:<offset>``."""
+        name, sep, offset = argument.strip().rpartition(":")
+        if not sep:
+            return self.send_file(sock, offset, False)
+        if not offset.isdigit():
+            return self._send(sock, b"Error: Invalid offset\n")
+        self.send_file(sock, name, False, int(offset))
+
+    def read_http_range(self, sock: socket.socket, buffer: bytearray) -> int:
+        """Consume the request headers; start of ``Range: bytes=<n>-`` or 0."""
+        offset = 0
+        for _ in range(32):
+            line = self._recv_line(sock, buffer)
+            if not line:
+                break
+            match = re.match(r"range:\s*bytes=(\d+)-", line, re.IGNORECASE)
+            if match:
+                offset = int(match.group(1))
+        return offset
+
+    def handle_http_request(self, sock: socket.socket, request_line: str, buffer: bytearray = None) -> bool:
+        parts = request_line.split(" ")
+        if len(parts) < 3 or parts[0] != "GET":
+            return False
+        path = parts[1]
+        range_start = self.read_http_range(sock, buffer if buffer is not None else bytearray())
+        if path.startswith("/files"):
+            if not self.sd_mounted:
+                body = "SD not ready\n"
+                status = "503 Service Unavailable"
+                content_type = "text/plain"
+            else:
+                body = json.dumps([{"name": n, "size": s} for n, s in self.list_files_info()], separators=(",", ":"))
+                status = "200 OK"
+                content_type = "application/json"
+            header = (
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\n\r\n"
+            )
+            self._send(sock, (header + body).encode())
+            return True
+        if path.startswith("/download"):
+            match = re.search(r"[?&]file=([^&]*)", path)
+            self.send_file(sock, match.group(1) if match else "", True, range_start)
+            return True
+        return False
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                client, _ = self.listen_sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if self.single_client:
+                self._serve_client(client)
+            else:
+                threading.Thread(target=self._serve_client, args=(client,), daemon=True).start()
+
+    def stream_samples(self, client: socket.socket, buffer: bytearray, binary: bool = False) -> bool:
+        """Push every new sample until ``streamStop``; False when the connection is gone."""
+        self._send(client, b"STREAM started\n")
+        with self.rt_lock:
+            next_seq = self.rt_seq
+        while self.running:
+            samples, head = self.copy_since(next_seq, 32)
+            if samples:
+                if binary:
+                    self._send(client, self.encode_samples(samples, head))
+                else:
+                    lines = "".join(
+                        f"S {dp.seq}; {dp.timestamp_ms}; {dp.adc0:.1f}; {dp.adc1:.1f}; {dp.adc2:.1f}\n"
+                        for dp in samples
+                    )
+                    self._send(client, lines.encode())
+                next_seq = samples[-1].seq + 1
+                if len(samples) == 32:
+                    continue
+            readable, _, _ = select.select([client], [], [], 0.01)
+            if not readable:
+                continue
+            chunk = client.recv(4096)
+            if not chunk:
+                return False
+            buffer.extend(chunk)
+            while b"\n" in buffer:
+                line, _, rest = bytes(buffer).partition(b"\n")
+                buffer[:] = rest
+                if line.strip() == b"streamStop":
+                    self._send(client, b"STREAM stopped\n")
+                    return True
+        return False
+
+    def _recv_line(self, client: socket.socket, buffer: bytearray) -> Optional[str]:
+        while self.running:
+            end = buffer.find(b"\n")
+            if end >= 0:
+                line = bytes(buffer[:end])
+                del buffer[: end + 1]
+                return line.decode("ascii", errors="ignore").rstrip("\r")[:256]
+            try:
+                chunk = client.recv(4096)
+            except socket.timeout:
+                continue
+            if not chunk:
+                return None
+            buffer.extend(chunk)
+        return None
+
+    def _serve_client(self, client: socket.socket):
+        self.clients_served += 1
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client.settimeout(0.2)
+        buffer = bytearray()
+        binary = False
+        try:
+            while True:
+                request = self._recv_line(client, buffer)
+                if request is None:
+                    break
+                self.commands_served += 1
+                if self.drop_probability and self.random.random() < self.drop_probability:
+                    break
+                if self.latency:
+                    time.sleep(self.latency)
+                if self.handle_http_request(client, request, buffer):
+                    break
+                if request.startswith("hostFile="):
+                    self.host_file(client, request[9:])
+                    break
+                if request.strip() == "stream":
+                    if not self.stream_samples(client, buffer, binary):
+                        break
+                    continue
+                if request.startswith("format="):
+                    fmt = request[7:].strip()
+                    if fmt in FORMATS:
+                        binary = fmt == "bin"
+                        self._send(client, f"OK format={fmt}\n".encode())
+                    else:
+                        self._send(client, f"Error: Unknown format '{fmt}'. Use text or bin\n".encode())
+                    continue
+                if binary and request.strip() == "adc":
+                    self._send(client, self.read_adc_binary())
+                    continue
+                if binary and request.startswith("adcSince="):
+                    self._send(client, self.read_since_binary(self.parse_since_seq(request)))
+                    continue
+                response = self.process_request(request)
+                self._send(client, (response + "\n").encode())
+                if request.startswith("wifi=") and not response.startswith("Error"):
+                    break
+        except OSError as e:
+            logger.debug(f"[{self.__class__.__name__}._serve_client] {e}")
+        finally:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="esp_adc_simulator", description="Local ESP ADC firmware simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=8080, type=int)
+    parser.add_argument("--rate", default=100, type=float, help="Samples per second")
+    parser.add_argument("--sd-dir", default=None, help="Directory that plays the SD card (temporary by default)")
+    parser.add_argument("--latency", default=0.0, type=float, help="Seconds added before every reply")
+    parser.add_argument("--bandwidth", default=None, type=float, help="Send rate limit, bytes/s")
+    parser.add_argument("--drop", default=0.0, type=float, help="Probability to drop the connection per command")
+    parser.add_argument("--multi-client", action="store_true", help="Serve clients concurrently")
+    parser.add_argument("--transfer-limit", default=None, type=int, help="Cut every download after this many bytes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] [%(levelname)s] %(message)s")
+    simulator = EspAdcSimulator(
+        host=args.host,
+        port=args.port,
+        rate=args.rate,
+        sd_dir=args.sd_dir,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        drop_probability=args.drop,
+        single_client=not args.multi_client,
+        transfer_limit=args.transfer_limit,
+    )
+    with simulator:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import logging
 import socket
 import time
-from typing import Union
+from typing import List, Union
 
 from api.base import AdapterInterface
 from api.exceptions import DeviceConnectionError
@@ -15,11 +15,14 @@ class SocketAdapter(AdapterInterface):
         host: str,
         port: int,
         timeout: float = 10,
-        delay: float = 0.05,
+        delay: float = 0,
+        pipeline_depth: int = 8,
         *args,
         **kwargs,
     ):
         self.socket = None
+        self.buffer = bytearray()
+        self.pipeline_depth = max(int(pipeline_depth), 1)
         self.host = host
         try:
             self.port = int(port)
@@ -39,6 +42,7 @@ class SocketAdapter(AdapterInterface):
 
     def connect(self, timeout: float = 2):
         self.set_timeout(timeout)
+        self.buffer.clear()
         try:
             self.socket.connect((self.host, self.port))
             logger.debug(f"[{self.__class__.__name__}.connect]Socket has been connected {self.socket}.")
@@ -47,17 +51,23 @@ class SocketAdapter(AdapterInterface):
             raise DeviceConnectionError("Unable to connect socket")
 
     def is_socket_closed(self) -> Union[bool, None]:
+        if self.socket is None or self.socket.fileno() < 0:
+            return True
         try:
             # this will try to read bytes without blocking and also without removing them from buffer (peek only)
-            data = self.socket.recv(16)
+            self.socket.setblocking(False)
+            try:
+                data = self.socket.recv(16, socket.MSG_PEEK)
+            finally:
+                self.socket.settimeout(self.timeout)
             if len(data) == 0:
                 logger.debug(f"[{self.__class__.__name__}.is_socket_closed] Socket is closed")
                 return True
         except BlockingIOError:
             logger.debug(f"[{self.__class__.__name__}.is_socket_closed] BlockingIOError, socket is opened")
             return False  # socket is open and reading from it would block
-        except ConnectionResetError:
-            logger.debug(f"[{self.__class__.__name__}.is_socket_closed] ConnectionResetError, socket is closed")
+        except ConnectionError:
+            logger.debug(f"[{self.__class__.__name__}.is_socket_closed] ConnectionError, socket is closed")
             return True  # socket was closed for some other reason
         except Exception as e:
             logger.error(
@@ -72,21 +82,102 @@ class SocketAdapter(AdapterInterface):
             logger.warning(f"[{self.__class__.__name__}.close] Socket is None")
             return
         self.socket.close()
+        self.buffer.clear()
         logger.debug(f"[{self.__class__.__name__}.close] Socket has been closed.")
 
     def write(self, command: str, **kwargs):
         self._send(command)
 
     def read(self, num_bytes=1024, **kwargs):
+        if self.buffer:
+            return self.pop_buffer(num_bytes).decode("ascii").rstrip().replace("\n", "")
         return self._recv(num_bytes)
 
-    def query(self, command: str, buffer_size=1024 * 1024, delay: float = 0, **kwargs):
+    def read_line(self, timeout: float = None) -> bytes:
+        """
+        Return one response without its terminator as soon as it is complete.
+        Bytes received after the terminator stay in the buffer for the next call.
+        """
+        start = 0
+        deadline = time.monotonic() + (timeout or self.timeout)
+        try:
+            while True:
+                end = self.buffer.find(b"\n", start)
+                if end >= 0:
+                    line = bytes(self.buffer[:end])
+                    del self.buffer[: end + 1]
+                    return line.rstrip(b"\r")
+                start = len(self.buffer)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No response terminator within {timeout or self.timeout} s")
+                self.socket.settimeout(remaining)
+                chunk = self.socket.recv(64 * 1024)
+                if not chunk:
+                    raise DeviceConnectionError("Connection closed by device")
+                self.buffer.extend(chunk)
+        finally:
+            self.socket.settimeout(self.timeout)
+
+    def read_exact(self, num_bytes: int, timeout: float = None) -> bytes:
+        """Return exactly ``num_bytes`` bytes, used for binary frames."""
+        self._fill(num_bytes, timeout)
+        return self.pop_buffer(num_bytes)
+
+    def peek(self, num_bytes: int, timeout: float = None) -> bytes:
+        """Like ``read_exact`` but leaves the bytes in the buffer."""
+        self._fill(num_bytes, timeout)
+        return bytes(self.buffer[:num_bytes])
+
+    def _fill(self, num_bytes: int, timeout: float = None):
+        if len(self.buffer) >= num_bytes:
+            return
+        deadline = time.monotonic() + (timeout or self.timeout)
+        try:
+            while len(self.buffer) < num_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Only {len(self.buffer)}/{num_bytes} bytes within {timeout or self.timeout} s")
+                self.socket.settimeout(remaining)
+                chunk = self.socket.recv(max(64 * 1024, num_bytes - len(self.buffer)))
+                if not chunk:
+                    raise DeviceConnectionError("Connection closed by device")
+                self.buffer.extend(chunk)
+        finally:
+            self.socket.settimeout(self.timeout)
+
+    def pop_buffer(self, num_bytes: int = None) -> bytes:
+        """Take up to ``num_bytes`` already received bytes (all of them by default)."""
+        num_bytes = len(self.buffer) if num_bytes is None else min(num_bytes, len(self.buffer))
+        data = bytes(self.buffer[:num_bytes])
+        del self.buffer[:num_bytes]
+        return data
+
+    def query(self, command: str, timeout: float = None, delay: float = 0, **kwargs):
         self.write(command, **kwargs)
         if delay:
             time.sleep(delay)
         elif self.delay:
             time.sleep(self.delay)
-        return self.read(num_bytes=buffer_size)
+        return self.read_line(timeout=timeout).decode("ascii").rstrip()
+
+    def query_many(self, commands: List[str], depth: int = None, timeout: float = None, **kwargs) -> List[str]:
+        """
+        Send commands back to back keeping up to ``depth`` of them in flight.
+        The device answers in order, so the n-th reply belongs to the n-th command.
+        """
+        depth = max(int(depth or self.pipeline_depth), 1)
+        responses = []
+        sent = 0
+        while len(responses) < len(commands):
+            window_end = min(len(responses) + depth, len(commands))
+            if sent < window_end:
+                payload = "".join("%s\n" % command for command in commands[sent:window_end])
+                self.socket.sendall(payload.encode("ascii"))
+                sent = window_end
+            line = self.read_line(timeout=timeout)
+            responses.append(line.decode("ascii", errors="replace").rstrip())
+        return responses
 
     def set_timeout(self, timeout):
         if timeout < 1e-3 or timeout > 20:
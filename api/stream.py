@@ -0,0 +1,162 @@
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+from api.exceptions import DeviceConnectionError, DeviceProtocolError
+from api.protocol import FRAME_HEADER, FRAME_MAGIC, decode_records, parse_header, to_mv
+
+logger = logging.getLogger(__name__)
+
+# (seq, timestamp_ms, a0, a1, a2)
+StreamSample = Tuple[int, int, float, float, float]
+
+
+class SampleStream:
+    """
+    Consumer side of the firmware ``stream`` mode.
+
+    A reader thread owns the connection while streaming and puts every pushed sample into a ring buffer
+    of ``buffer_size`` items. When the consumer falls behind, the oldest samples are overwritten and counted
+    in ``dropped``; samples the device never delivered (gaps in ``seq``) are counted in ``lost``.
+    Samples are consumed with ``read()``, by iterating over the stream, or through ``callback(sample)``,
+    which is called from the reader thread. If the instrument negotiated ``format=bin``, the device pushes
+    binary frames of up to 32 samples, decoded in one ``numpy.frombuffer`` call each.
+    """
+
+    START = "STREAM started"
+    STOP = "STREAM stopped"
+
+    def __init__(self, instrument, buffer_size: int = 4096, callback: Callable[[StreamSample], None] = None):
+        self.instrument = instrument
+        self.buffer: Deque[StreamSample] = deque(maxlen=buffer_size)
+        self.callback = callback
+        self.received = 0
+        self.dropped = 0
+        self.lost = 0
+        self.last_seq: Optional[int] = None
+        self.error: Optional[Exception] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def adapter(self):
+        return self.instrument.adapter
+
+    def start(self) -> "SampleStream":
+        self.instrument.write("stream")
+        response = self.adapter.read_line().decode("ascii", errors="replace")
+        if response != self.START:
+            raise DeviceProtocolError(f"Streaming is not supported: {response}")
+        self._running = True
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+        return self
+
+    @staticmethod
+    def parse(line: bytes) -> Optional[StreamSample]:
+        try:
+            seq, ts, a0, a1, a2 = line[2:].split(b";")
+            return int(seq), int(ts), float(a0), float(a1), float(a2)
+        except ValueError:
+            return None
+
+    def _read_text(self) -> Optional[List[StreamSample]]:
+        line = self.adapter.read_line(timeout=max(self.adapter.timeout, 1))
+        if not line.startswith(b"S "):
+            return None if line.decode("ascii", errors="replace") == self.STOP else []
+        sample = self.parse(line)
+        return [] if sample is None else [sample]
+
+    def _read_binary(self) -> Optional[List[StreamSample]]:
+        timeout = max(self.adapter.timeout, 1)
+        if self.adapter.peek(len(FRAME_MAGIC), timeout=timeout) != FRAME_MAGIC:
+            return (
+                None if self.adapter.read_line(timeout=timeout).decode("ascii", errors="replace") == self.STOP else []
+            )
+        try:
+            header = parse_header(self.adapter.read_exact(FRAME_HEADER.size, timeout=timeout))
+        except ValueError as e:
+            raise DeviceProtocolError(str(e))
+        records = decode_records(self.adapter.read_exact(header.payload_size, timeout=timeout))
+        mv = to_mv(records, header.gain)
+        return list(zip(records["seq"].tolist(), records["ts"].tolist(), *mv.T.tolist()))
+
+    def _reader(self):
+        read_samples = self._read_binary if getattr(self.instrument, "binary", False) else self._read_text
+        try:
+            while True:
+                samples = read_samples()
+                if samples is None:
+                    break
+                for sample in samples:
+                    if self.last_seq is not None and sample[0] > self.last_seq + 1:
+                        self.lost += sample[0] - self.last_seq - 1
+                    self.last_seq = sample[0]
+                if not samples:
+                    continue
+                with self._condition:
+                    overflow = len(self.buffer) + len(samples) - self.buffer.maxlen
+                    if overflow > 0:
+                        self.dropped += overflow
+                    self.buffer.extend(samples)
+                    self.received += len(samples)
+                    self._condition.notify_all()
+                if self.callback is not None:
+                    for sample in samples:
+                        self.callback(sample)
+        except (OSError, DeviceConnectionError, DeviceProtocolError) as e:
+            logger.debug(f"[{self.__class__.__name__}._reader] {e}")
+            self.error = e
+        finally:
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def read(self, max_items: int = None, timeout: float = None) -> List[StreamSample]:
+        """Take buffered samples, waiting up to ``timeout`` seconds for the first one."""
+        with self._condition:
+            if not self.buffer and self._running:
+                self._condition.wait(timeout)
+            count = len(self.buffer) if max_items is None else min(max_items, len(self.buffer))
+            return [self.buffer.popleft() for _ in range(count)]
+
+    def __iter__(self):
+        while True:
+            samples = self.read(timeout=0.5)
+            if not samples and not self._running:
+                return
+            yield from samples
+
+    def stop(self, timeout: float = 2):
+        if self._thread is None:
+            return
+        if self._running:
+            try:
+                self.instrument.write("streamStop")
+            except OSError as e:
+                logger.debug(f"[{self.__class__.__name__}.stop] {e}")
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # устройство не подтвердило остановку — соединение в неизвестном состоянии
+            self.adapter.close()
+            self._thread.join(timeout)
+        self._thread = None
+        if self.error is not None:
+            raise DeviceConnectionError(f"Stream interrupted: {self.error}")
+
+    def stats(self) -> dict:
+        return {"received": self.received, "dropped": self.dropped, "lost": self.lost}
+
+    def __enter__(self):
+        if self._thread is None:
+            self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -1,9 +1,18 @@
+import errno
 import ipaddress
 import platform
 import re
+import selectors
 import socket
 import subprocess
-from typing import Optional
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, List, Optional
+
+# как часто во время перебора подсети заглядывать в ARP-таблицу
+ARP_CHECK_INTERVAL = 0.25
+# коды незавершённого неблокирующего connect (10035 — WSAEWOULDBLOCK в Windows)
+_CONNECT_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035}
 
 
 def import_class(path: str):
@@ -31,7 +40,96 @@ def _ping(ip: str) -> None:
 def _read_arp() -> str:
     system = platform.system().lower()
     cmd = ["arp", "-a"] if system == "windows" else ["arp", "-an"]
-    return subprocess.check_output(cmd, text=True, encoding="utf-8", errors="ignore")
+    try:
+        return subprocess.check_output(cmd, text=True, encoding="utf-8", errors="ignore")
+    except FileNotFoundError:
+        if system == "windows":
+            raise
+        # в современных Linux net-tools (arp) часто не установлен
+        return subprocess.check_output(["ip", "neigh"], text=True, encoding="utf-8", errors="ignore")
+
+
+def _find_in_arp(arp_output: str, target: str) -> Optional[str]:
+    for line in arp_output.splitlines():
+        line = line.strip()
+        m = re.search(r"\((?P<ip>\d+\.\d+\.\d+\.\d+)\)\s+at\s+(?P<mac>[0-9a-f:]{17})", line, re.IGNORECASE)
+        if m and _normalize_mac(m.group("mac")) == target:
+            return m.group("ip")
+        m2 = re.search(r"(?P<ip>\d+\.\d+\.\d+\.\d+)\s+(?P<mac>([0-9a-f]{2}-){5}[0-9a-f]{2})", line, re.IGNORECASE)
+        if m2 and _normalize_mac(m2.group("mac")) == target:
+            return m2.group("ip")
+        m3 = re.search(r"^(?P<ip>\d+\.\d+\.\d+\.\d+)\s.*lladdr\s+(?P<mac>[0-9a-f:]{17})", line, re.IGNORECASE)
+        if m3 and _normalize_mac(m3.group("mac")) == target:
+            return m3.group("ip")
+    return None
+
+
+def arp_lookup(target_mac: str) -> Optional[str]:
+    """IP of ``target_mac`` from the OS ARP table, without probing the network."""
+    try:
+        return _find_in_arp(_read_arp(), _normalize_mac(target_mac))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _tcp_sweep(hosts: List[str], port: int, concurrency: int, timeout: float) -> Iterator[int]:
+    """
+    Non-blocking connects to ``port`` of every host, at most ``concurrency`` at a time. A connect attempt makes
+    the OS resolve the host with ARP, the answer itself does not matter. Yields the number of finished probes.
+    """
+    selector = selectors.DefaultSelector()
+    pending = iter(hosts)
+    started = {}
+    done = 0
+    checked = time.monotonic()
+    try:
+        while True:
+            while len(started) < concurrency:
+                ip = next(pending, None)
+                if ip is None:
+                    break
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                if sock.connect_ex((ip, port)) in _CONNECT_IN_PROGRESS:
+                    selector.register(sock, selectors.EVENT_WRITE)
+                    started[sock] = time.monotonic() + timeout
+                else:
+                    sock.close()
+                    done += 1
+            if not started:
+                break
+            for key, _ in selector.select(timeout=0.05):
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                del started[key.fileobj]
+                done += 1
+            now = time.monotonic()
+            for sock in [sock for sock, deadline in started.items() if deadline <= now]:
+                selector.unregister(sock)
+                sock.close()
+                del started[sock]
+                done += 1
+            if now - checked >= ARP_CHECK_INTERVAL:
+                checked = now
+                yield done
+        yield done
+    finally:
+        for sock in started:
+            selector.unregister(sock)
+            sock.close()
+        selector.close()
+
+
+def _ping_sweep(hosts: List[str], concurrency: int) -> Iterator[int]:
+    """``ping`` of every host in ``concurrency`` parallel subprocesses. Yields the number of finished probes."""
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = {pool.submit(_ping, ip) for ip in hosts}
+        while futures:
+            finished, futures = wait(futures, timeout=ARP_CHECK_INTERVAL, return_when=FIRST_COMPLETED)
+            yield len(hosts) - len(futures)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 def _get_local_network() -> Optional[ipaddress.IPv4Network]:
@@ -91,33 +189,46 @@ def _get_local_network() -> Optional[ipaddress.IPv4Network]:
                 pass
         if not ip or not netmask:
             return None
-        ip_int = int(ipaddress.IPv4Address(ip))
-        mask_int = int(ipaddress.IPv4Address(netmask))
-        network_int = ip_int & mask_int
-        return ipaddress.IPv4Network((network_int, mask_int), strict=False)
+        # маска строкой: целое число во втором элементе кортежа IPv4Network считает длиной префикса
+        return ipaddress.IPv4Network(f"{ip}/{netmask}", strict=False)
     except Exception:
         return None
 
 
-def find_ip_by_mac(target_mac: str) -> Optional[str]:
+def find_ip_by_mac(
+    target_mac: str,
+    port: int = 80,
+    concurrency: int = 64,
+    timeout: float = 0.5,
+    use_ping: bool = False,
+    on_progress: Callable[[int, int], None] = None,
+) -> Optional[str]:
     """
-    Определяет подсеть (ip/mask), делает ping sweep, читает ARP и ищет MAC.
+    Определяет подсеть (ip/mask), параллельно опрашивает её хосты и ищет MAC в ARP-таблице.
+
+    Хосты опрашиваются неблокирующими TCP connect на ``port`` (или ``ping``, если ``use_ping``), не более
+    ``concurrency`` одновременно, каждый не дольше ``timeout`` секунд. ARP-таблица проверяется по ходу
+    перебора, поиск заканчивается, как только MAC в ней появился. ``on_progress(done, total)`` — прогресс.
     """
     target = _normalize_mac(target_mac)
+    # устройство могло уже оказаться в ARP-кэше — тогда перебор не нужен
+    ip = arp_lookup(target_mac)
+    if ip:
+        return ip
     net = _get_local_network()
     if not net:
         return None
 
-    for ip in net.hosts():
-        _ping(str(ip))
-
-    arp_output = _read_arp()
-    for line in arp_output.splitlines():
-        line = line.strip()
-        m = re.search(r"\((?P<ip>\d+\.\d+\.\d+\.\d+)\)\s+at\s+(?P<mac>[0-9a-f:]{17})", line, re.IGNORECASE)
-        if m and _normalize_mac(m.group("mac")) == target:
-            return m.group("ip")
-        m2 = re.search(r"(?P<ip>\d+\.\d+\.\d+\.\d+)\s+(?P<mac>([0-9a-f]{2}-){5}[0-9a-f]{2})", line, re.IGNORECASE)
-        if m2 and _normalize_mac(m2.group("mac")) == target:
-            return m2.group("ip")
+    hosts = [str(host) for host in net.hosts()]
+    concurrency = max(int(concurrency), 1)
+    sweep = _ping_sweep(hosts, concurrency) if use_ping else _tcp_sweep(hosts, int(port), concurrency, timeout)
+    try:
+        for done in sweep:
+            if callable(on_progress):
+                on_progress(done, len(hosts))
+            ip = _find_in_arp(_read_arp(), target)
+            if ip:
+                return ip
+    finally:
+        sweep.close()
     return None
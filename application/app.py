@@ -3,13 +3,18 @@ import logging
 from PyQt5 import QtWidgets
 from PyQt5.QtGui import QIcon
 
-from application.widgets import PlotWidget, SdMeasureGroup, SdData, MonitorGroup, MeasureGroup
+from api import SessionManager
+from application.widgets import PlotWidget, SdMeasureGroup, MonitorGroup, MeasureGroup
+from application.widgets.base_data import BaseData
 from application.widgets.base_init import BaseInit
 from application.widgets.config_group import ConfigGroup
 from application.widgets.log import LogWidget, LogHandler
 from application.widgets.monitor import MonitorGroup
+from store.data import MeasureManager
 from store.state import State
 
+logger = logging.getLogger(__name__)
+
 
 class MainWidget(QtWidgets.QWidget):
     def __init__(self, parent):
@@ -43,7 +48,7 @@ class MainWidget(QtWidgets.QWidget):
         hlayout_measure.addWidget(self.sd_measure_group)
         right_vlayout.addLayout(hlayout_measure)
 
-        right_vlayout.addWidget(SdData(self))
+        right_vlayout.addWidget(BaseData(self))
 
         hlayout.addLayout(left_vlayout)
         hlayout.addLayout(right_vlayout)
@@ -84,4 +89,9 @@ class App(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
         State.store_state()
+        try:
+            MeasureManager.save_all()
+        except OSError as e:
+            logger.error(f"Can't dump the session: {e}")
+        SessionManager.close_all()
         event.accept()
@@ -4,7 +4,7 @@ from PyQt5 import QtWidgets
 from PyQt5.QtCore import QThread, pyqtSignal
 
 from api.constants import GAINS, GAIN_TYPES
-from api import EspAdc
+from api import SessionManager
 from store.state import State
 
 
@@ -20,10 +20,13 @@ class SetGainThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
-                daq.set_gain(self.gain)
-                State.gain = self.gain
-                self.log.emit({"type": "info", "msg": f"Voltage Range is {GAINS[self.gain]}"})
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
+                response = daq.set_gain(self.gain)
+                if "Error" in response or "not ready" in response:
+                    self.log.emit({"type": "error", "msg": response})
+                else:
+                    State.gain = self.gain
+                    self.log.emit({"type": "info", "msg": f"Voltage Range is {GAINS[self.gain]}"})
         except Exception as e:
             self.log.emit({"type": "error", "msg": str(e)})
         self.finished.emit()
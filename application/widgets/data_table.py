@@ -101,6 +101,8 @@ class DataTable(QWidget):
         self.model = MeasureTableModel()
         MeasureManager.table = self.model
         self.tableView.setModel(self.model)
+        # измерения прошлой сессии, массивы читаются из дампа по требованию
+        MeasureManager.restore()
 
         self.tableView.setColumnWidth(DataTableColumns.ID.index, 30)
         self.tableView.setColumnWidth(DataTableColumns.SAVED.index, 60)
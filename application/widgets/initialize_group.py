@@ -5,8 +5,8 @@ from typing import Union
 from PyQt5 import QtWidgets
 from PyQt5.QtCore import QThread, pyqtSignal
 
-from api import EspAdc
-from api.constants import ADAPTERS
+from api import SessionManager
+from api.constants import ADAPTERS, ASYNC_ADAPTERS
 
 from store.state import State
 
@@ -25,11 +25,13 @@ class InitializeThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=self.host, port=self.port, adapter=self.adapter) as daq:
+            with SessionManager.session(host=self.host, port=self.port, adapter=self.adapter) as daq:
                 self.status.emit("Success Connected!")
                 State.adapter = self.adapter
                 State.host = self.host
                 State.port = self.port
+            stats = SessionManager.get(host=self.host, port=self.port, adapter=self.adapter).stats()
+            self.log.emit({"type": "info", "msg": f"Session stats: {stats}"})
         except Exception as e:
             self.status.emit(textwrap.shorten(str(e), width=50))
             self.log.emit({"type": "error", "msg": str(e)})
@@ -50,7 +52,7 @@ class InitializeGroup(QtWidgets.QGroupBox):
         self.host.setText(State.host)
 
         self.adapter = QtWidgets.QComboBox(self)
-        self.adapter.addItems(ADAPTERS.keys())
+        self.adapter.addItems([name for name in ADAPTERS if name not in ASYNC_ADAPTERS])
         self.adapter.setCurrentText(State.adapter)
 
         self.port_line = QtWidgets.QLineEdit(self)
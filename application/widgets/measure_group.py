@@ -1,52 +1,181 @@
 import logging
 import time
-from typing import Dict
+from datetime import datetime
+from typing import Dict, List, Optional
 
+import numpy as np
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtCore import pyqtSignal
 
-from api import EspAdc
+from api import SessionManager, SequenceTracker, DeadlineScheduler
+from api.scheduler import POLICIES
+from store.data import MeasureManager
+from store.samples import SampleStore
 from store.state import State
 
 logger = logging.getLogger(__name__)
 
+# предел задаёт транспорт, а не таймер: фактическая частота видна в статистике
+MAX_RPS = 2000
+
 
 class MeasureThread(QtCore.QThread):
+    """
+    Acquisition thread. Samples are collected into a preallocated array and emitted by ``data_batch``
+    not more often than every ``BATCH_INTERVAL`` seconds as one ``np.ndarray`` of shape (n, 4):
+    column 0 is the time in seconds, column ``i`` is the voltage of channel ``i``.
+    Polling is paced by a ``DeadlineScheduler``; its rate and jitter are published with the ``stats``.
+    With ``State.store_data`` every sample is also kept in ``store`` to be registered as a measurement.
+    """
+
     finished = pyqtSignal(int)
-    data_plot = pyqtSignal(list)
+    data_batch = pyqtSignal(object)
+    stats = pyqtSignal(dict)
     log = pyqtSignal(dict)
 
-    def __init__(self, parent, rps: int):
+    STATS_INTERVAL = 1
+    BATCH_INTERVAL = 0.05
+    BATCH_CAPACITY = 1024
+
+    def __init__(self, parent, rps: int, stream: bool = False, policy: str = "skip"):
         super().__init__(parent)
         self.duration = State.duration
         self.rps = rps
+        self.stream = stream
+        self.tracker = SequenceTracker()
+        self.scheduler = None if stream else DeadlineScheduler(rps, policy=policy)
+        # итоговая статистика для метаданных измерения
+        self.summary: Dict = {}
+        self.store = SampleStore(max_bytes=State.store_ram_mb * 1024 * 1024) if State.store_data else None
+        # колонки (time, AI1, AI2, AI3) завершённого store, собираются в потоке измерения
+        self.columns: Optional[List[np.ndarray]] = None
+        self.started_at = datetime.now()
+        self.stats_emitted = 0.0
+        self.batch = np.empty((self.BATCH_CAPACITY, 4))
+        self.batch_size = 0
+        self.batch_emitted = 0.0
 
     def run(self) -> None:
+        self.started_at = datetime.now()
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
                 self.log.emit({"type": "info", "msg": "Device Connected!"})
-                start = time.time()
-                while State.is_measuring:
-                    data_plot = []
-                    time.sleep(1 / self.rps)
-                    data = daq.read_data()
-                    if data:
-                        duration = time.time() - start
-                        a0, a1, a2 = data
-                        data_plot.append({"channel": 1, "voltage": a0, "time": duration})
-                        data_plot.append({"channel": 2, "voltage": a1, "time": duration})
-                        data_plot.append({"channel": 3, "voltage": a2, "time": duration})
-                        if duration > self.duration:
-                            State.is_measuring = False
-                    if data_plot:
-                        self.data_plot.emit(data_plot)
+                # бинарные кадры вчетверо короче текста; старая прошивка отвечает ошибкой и остаётся в текстовом режиме
+                if not daq.binary and not daq.set_format("bin"):
+                    self.log.emit({"type": "info", "msg": "Binary sample format is not supported, using text"})
+                if self.stream:
+                    self.run_stream(daq)
+                else:
+                    self.run_polling(daq)
         except Exception as e:
             self.log.emit({"type": "error", "msg": str(e)})
             self.finish(1)
             return
         self.finish(0)
 
+    def acquisition_stats(self) -> Dict:
+        stats = self.tracker.stats()
+        if self.scheduler is not None:
+            stats.update(self.scheduler.stats())
+        return stats
+
+    def emit_stats(self, force: bool = False) -> None:
+        now = time.time()
+        if force or now - self.stats_emitted >= self.STATS_INTERVAL:
+            self.stats_emitted = now
+            self.stats.emit(self.acquisition_stats())
+
+    def add_sample(self, duration: float, a0: float, a1: float, a2: float) -> None:
+        """Write one row straight into the pending batch."""
+        if self.batch_size == len(self.batch):
+            self.emit_batch(force=True)
+        self.batch[self.batch_size] = duration, a0, a1, a2
+        self.batch_size += 1
+
+    def add_samples(self, rows: np.ndarray) -> None:
+        """Append (time, AI1, AI2, AI3) rows to the pending batch."""
+        while len(rows):
+            if self.batch_size == len(self.batch):
+                self.emit_batch(force=True)
+            n = min(len(rows), len(self.batch) - self.batch_size)
+            self.batch[self.batch_size : self.batch_size + n] = rows[:n]
+            self.batch_size += n
+            rows = rows[n:]
+
+    def emit_batch(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not self.batch_size or (not force and now - self.batch_emitted < self.BATCH_INTERVAL):
+            return
+        self.batch_emitted = now
+        if self.store is not None:
+            self.store.append(self.batch[: self.batch_size])
+        # массив переиспользуется, поэтому получатель берёт копию
+        self.data_batch.emit(self.batch[: self.batch_size].copy())
+        self.batch_size = 0
+
+    def run_polling(self, daq) -> None:
+        start = time.time()
+        while State.is_measuring:
+            self.scheduler.wait()
+            data = daq.read_data(with_timestamp=True)
+            self.emit_stats()
+            if data:
+                seq, ts, a0, a1, a2 = data
+                # опрос чаще частоты прошивки возвращает тот же отсчёт — не рисуем его повторно
+                if not self.tracker.accept(seq, ts):
+                    continue
+                if ts is None:
+                    duration = time.time() - start
+                else:
+                    duration = self.tracker.elapsed(ts)
+                self.add_sample(duration, a0, a1, a2)
+                if duration > self.duration:
+                    State.is_measuring = False
+            self.emit_batch()
+        self.emit_batch(force=True)
+
+    def run_stream(self, daq) -> None:
+        """Consume the device push stream; time axis comes from the device timestamps."""
+        with daq.stream() as stream:
+            start_ts = None
+            while State.is_measuring:
+                samples = stream.read(timeout=0.1)
+                if not samples:
+                    if not stream.running:
+                        break
+                    self.emit_batch()
+                    continue
+                for seq, ts, *_ in samples:
+                    self.tracker.accept(seq, ts)
+                rows = np.array(samples, dtype=float)
+                if start_ts is None:
+                    start_ts = rows[0, 1]
+                # (seq, ts, a0, a1, a2) -> (time, a0, a1, a2) на месте
+                rows[:, 1] = (rows[:, 1] - start_ts) / 1000
+                self.add_samples(rows[:, 1:])
+                self.emit_batch()
+                self.emit_stats()
+                if rows[-1, 1] > self.duration:
+                    State.is_measuring = False
+            self.emit_batch(force=True)
+        stats = stream.stats()
+        log_type = "warning" if stats["dropped"] or stats["lost"] else "info"
+        self.log.emit({"type": log_type, "msg": f"Stream: {stats}"})
+
     def finish(self, code: int = 0):
+        # после ошибки в пакете могли остаться отсчёты
+        self.emit_batch(force=True)
+        if self.tracker.started is not None:
+            self.emit_stats(force=True)
+            self.summary = self.acquisition_stats()
+            self.log.emit({"type": "info", "msg": f"Acquisition: {self.summary}"})
+            if self.scheduler is not None and self.summary["poll_rate"] < 0.95 * self.rps:
+                msg = f"Transport sustained {self.summary['poll_rate']:.1f} of {self.rps} RpS"
+                self.log.emit({"type": "warning", "msg": msg})
+        if self.store is not None and len(self.store):
+            # дозапись на диск или склейка чанков длится долго, в потоке GUI она заморозила бы окно
+            self.columns = self.store.columns()
+        self.store = None
         self.finished.emit(code)
 
 
@@ -76,17 +205,56 @@ class MeasureGroup(QtWidgets.QGroupBox):
         self.plot_window.setValue(State.plot_window)
         self.plot_window.valueChanged.connect(self.set_plot_window)
 
+        self.store_data = QtWidgets.QCheckBox(self)
+        self.store_data.setText("Store data, MB")
+        self.store_data.setToolTip("Keep the measurement in the data table; samples above the RAM limit go to disk")
+        self.store_data.setChecked(State.store_data)
+        self.store_data.stateChanged.connect(self.set_store_data)
+
+        self.store_ram = QtWidgets.QSpinBox(self)
+        self.store_ram.setToolTip("RAM limit of a stored measurement, MB")
+        self.store_ram.setRange(16, 16384)
+        self.store_ram.setValue(State.store_ram_mb)
+        self.store_ram.valueChanged.connect(self.set_store_ram)
+        self.store_ram.setEnabled(State.store_data)
+
+        self.plot_history = QtWidgets.QCheckBox(self)
+        self.plot_history.setText("Full history")
+        self.plot_history.setToolTip("Keep the whole measurement on the plot, zoom in for full resolution")
+        self.plot_history.setChecked(State.plot_history)
+        self.plot_history.stateChanged.connect(self.set_plot_history)
+        self.plot_window.setEnabled(not State.plot_history)
+
         self.rps = QtWidgets.QSpinBox(self)
         self.rps.setToolTip("Requests per Second")
-        self.rps.setRange(1, 100)
+        self.rps.setRange(1, MAX_RPS)
         self.rps.setValue(State.rps)
         self.rps.valueChanged.connect(self.set_rps)
 
+        self.policy = QtWidgets.QComboBox(self)
+        self.policy.setToolTip(
+            "What to do with polls that missed their time slot: skip them and keep the grid, "
+            "or catch up with back-to-back polls"
+        )
+        self.policy.addItems(POLICIES)
+        self.policy.setCurrentText(State.schedule_policy)
+        self.policy.currentTextChanged.connect(self.set_policy)
+
+        self.stream = QtWidgets.QCheckBox(self)
+        self.stream.setText("Stream")
+        self.stream.setToolTip("Device pushes every sample (firmware OUTPUT_HZ), RpS is ignored")
+        self.stream.setChecked(State.stream)
+        self.stream.stateChanged.connect(self.set_stream)
+
         flayout.setLabelAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
         flayout.setFormAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
         flayout.addRow("Measuring Time, s:", self.duration)
         flayout.addRow("RpS:", self.rps)
+        flayout.addRow("Late polls:", self.policy)
+        flayout.addRow(self.stream)
         flayout.addRow(self.is_plot_data, self.plot_window)
+        flayout.addRow(self.plot_history)
+        flayout.addRow(self.store_data, self.store_ram)
 
         self.btn_start = QtWidgets.QPushButton("Start", self)
         self.btn_start.clicked.connect(self.start_measure)
@@ -106,8 +274,11 @@ class MeasureGroup(QtWidgets.QGroupBox):
             parent.plot_widget.clear()
         if hasattr(parent, "monitor_widget"):
             parent.monitor_widget.reset_values()
-        self.thread_measure = MeasureThread(self, rps=self.rps.value())
-        self.thread_measure.data_plot.connect(self.plot_data)
+        self.thread_measure = MeasureThread(
+            self, rps=self.rps.value(), stream=self.stream.isChecked(), policy=self.policy.currentText()
+        )
+        self.thread_measure.data_batch.connect(self.plot_data)
+        self.thread_measure.stats.connect(self.show_stats)
         self.thread_measure.log.connect(self.set_log)
         self.btn_start.setEnabled(False)
         self.thread_measure.finished.connect(self.finish_measure)
@@ -126,13 +297,39 @@ class MeasureGroup(QtWidgets.QGroupBox):
             logger.info("Measure finished successfully!")
         else:
             logger.error("Measure finished due to Error!")
+        # прерванное ошибкой измерение тоже сохраняем — до ошибки данные корректны
+        self.store_measure()
+
+    def store_measure(self):
+        thread = self.thread_measure
+        if thread is None or thread.columns is None:
+            return
+        time_, *channels = thread.columns
+        thread.columns = None
+        rps = thread.rps if not thread.stream else round(thread.summary.get("device_rate", 0.0), 2)
+        measure = MeasureManager.create(
+            data={
+                "rps": rps,
+                "stats": thread.summary,
+                "time": time_,
+                "data": {channel: values for channel, values in enumerate(channels, start=1)},
+            },
+            started=thread.started_at,
+        )
+        measure.save()
+        logger.info(f"Measure {measure.id} stored: {len(time_)} samples")
 
-    def plot_data(self, data: list):
+    def plot_data(self, batch: np.ndarray):
         parent = self.parent()
         if self.is_plot_data.isChecked() and hasattr(parent, "plot_widget"):
-            parent.plot_widget.add_plots(data)
+            parent.plot_widget.add_batch(batch)
+        if hasattr(parent, "monitor_widget"):
+            parent.monitor_widget.add_batch(batch)
+
+    def show_stats(self, stats: Dict):
+        parent = self.parent()
         if hasattr(parent, "monitor_widget"):
-            parent.monitor_widget.add_data(data)
+            parent.monitor_widget.set_stats(stats)
 
     @staticmethod
     def set_duration(value):
@@ -142,16 +339,36 @@ class MeasureGroup(QtWidgets.QGroupBox):
     def set_rps(value):
         State.rps = int(value)
 
+    @staticmethod
+    def set_policy(value):
+        State.schedule_policy = value
+
     def set_is_plot_data(self, state):
         if state == QtCore.Qt.CheckState.Checked:
             State.is_plot_data = True
             return
         State.is_plot_data = False
 
+    def set_stream(self, state):
+        State.stream = state == QtCore.Qt.CheckState.Checked
+
+    def set_plot_history(self, state):
+        State.plot_history = state == QtCore.Qt.CheckState.Checked
+        # окно в точках имеет смысл только без полной истории; применяется со следующего измерения
+        self.plot_window.setEnabled(not State.plot_history)
+
     @staticmethod
     def set_plot_window(value):
         State.plot_window = int(value)
 
+    def set_store_data(self, state):
+        State.store_data = state == QtCore.Qt.CheckState.Checked
+        self.store_ram.setEnabled(State.store_data)
+
+    @staticmethod
+    def set_store_ram(value):
+        State.store_ram_mb = int(value)
+
     @staticmethod
     def set_log(log: Dict):
         log_type = log.get("type")
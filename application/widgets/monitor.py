@@ -1,5 +1,6 @@
-from typing import List, Dict
+from typing import Dict
 
+import numpy as np
 from PyQt5 import QtWidgets, QtCore
 
 
@@ -43,14 +44,41 @@ class MonitorGroup(QtWidgets.QGroupBox):
         hlayout.addLayout(glayout_timer)
         hlayout.addStretch()
 
-        self.setLayout(hlayout)
+        self.stats = QtWidgets.QLabel(self)
+        self.stats.setToolTip(
+            "Unique samples per second (device output rate), share of repeated polls and samples skipped by polling; "
+            "achieved poll rate, lateness of polls against their deadlines and polls that missed their slot"
+        )
 
-    def add_data(self, data: List[Dict]):
-        for dat in data:
-            ai = getattr(self, f"ai{dat['channel']}")
-            ai.setText(f"<h3>{dat['voltage']:.2f}</h3>")
+        vlayout = QtWidgets.QVBoxLayout()
+        vlayout.addLayout(hlayout)
+        vlayout.addWidget(self.stats)
+        self.setLayout(vlayout)
 
-        self.timer.setText(f"<h3>{data[0]['time']:.2f}</h3>")
+    def add_batch(self, batch: np.ndarray):
+        """Show the last sample of a ``MeasureThread.data_batch``."""
+        if not len(batch):
+            return
+        last = batch[-1]
+        for channel in range(1, len(last)):
+            ai = getattr(self, f"ai{channel}")
+            ai.setText(f"<h3>{last[channel]:.2f}</h3>")
+
+        self.timer.setText(f"<h3>{last[0]:.2f}</h3>")
+
+    def set_stats(self, stats: Dict):
+        text = (
+            f"Rate: {stats['rate']:.1f} Hz (device {stats['device_rate']:.1f} Hz); "
+            f"duplicates: {stats['duplicate_ratio']:.1%}; gaps: {stats['gaps']} ({stats['missed']} samples)"
+        )
+        if "poll_rate" in stats:
+            # статистика планировщика опроса, в потоковом режиме её нет
+            text += (
+                f"\nPolls: {stats['poll_rate']:.1f} of {stats['target_rps']:.0f} RpS; "
+                f"jitter p50/p95/p99: {stats['jitter_p50_ms']:.2f}/{stats['jitter_p95_ms']:.2f}/"
+                f"{stats['jitter_p99_ms']:.2f} ms; late: {stats['late_polls']}, skipped: {stats['skipped_polls']}"
+            )
+        self.stats.setText(text)
 
     def reset_values(self):
         for i in range(1, 4):
@@ -58,3 +86,4 @@ class MonitorGroup(QtWidgets.QGroupBox):
             ai.setText("<h3>N\A</h3>")
 
         self.timer.setText("<h3>N\A</h3>")
+        self.stats.clear()
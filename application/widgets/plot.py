@@ -1,11 +1,156 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
-from PyQt5 import QtWidgets
+import numpy as np
+from PyQt5 import QtWidgets, QtCore
 import pyqtgraph as pg
 
 from store.state import State
 
 
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of rows on a preallocated numpy array.
+    Every row is written twice (at ``i`` and ``i + capacity``), so the contents are always one contiguous
+    slice: appends are O(1) and ``view()`` needs no copy.
+    """
+
+    def __init__(self, capacity: int, columns: int):
+        self.capacity = max(int(capacity), 1)
+        self.data = np.empty((2 * self.capacity, columns))
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        end = (self.start + self.size) % self.capacity
+        self.data[end] = row
+        self.data[end + self.capacity] = row
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def extend(self, rows: np.ndarray):
+        rows = rows[-self.capacity :]
+        n = len(rows)
+        if not n:
+            return
+        positions = (self.start + self.size + np.arange(n)) % self.capacity
+        self.data[positions] = rows
+        self.data[positions + self.capacity] = rows
+        total = self.size + n
+        if total > self.capacity:
+            self.start = (self.start + total - self.capacity) % self.capacity
+            self.size = self.capacity
+        else:
+            self.size = total
+
+    def view(self) -> np.ndarray:
+        return self.data[self.start : self.start + self.size]
+
+    def resize(self, capacity: int) -> "RingBuffer":
+        """New buffer of another capacity with the latest rows of this one."""
+        buffer = RingBuffer(capacity, self.data.shape[1])
+        buffer.extend(self.view())
+        return buffer
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+
+
+class MinMaxPyramid:
+    """
+    Whole history of one channel with min/max levels of detail: level ``k`` keeps the first time, the minimum
+    and the maximum of every ``FACTOR**k`` consecutive samples. Samples are appended to level 0, the other
+    levels are extended incrementally by ``update``. ``query`` takes the coarsest level that still gives
+    about one bucket per pixel of the visible range, so the cost of a frame depends on the plot width,
+    not on the length of the history; a zoomed-in range gets the raw samples.
+    """
+
+    FACTOR = 4
+
+    def __init__(self, capacity: int = 4096):
+        # строки уровня: время первого отсчёта корзины, минимум, максимум
+        self.levels: List[np.ndarray] = [np.empty((capacity, 3))]
+        self.counts: List[int] = [0]
+
+    def __len__(self):
+        return self.counts[0]
+
+    def _reserve(self, level: int, extra: int):
+        needed = self.counts[level] + extra
+        if needed > len(self.levels[level]):
+            grown = np.empty((max(needed, 2 * len(self.levels[level])), 3))
+            grown[: self.counts[level]] = self.levels[level][: self.counts[level]]
+            self.levels[level] = grown
+
+    def append(self, t: float, v: float):
+        self._reserve(0, 1)
+        self.levels[0][self.counts[0]] = (t, v, v)
+        self.counts[0] += 1
+
+    def extend(self, t: np.ndarray, v: np.ndarray):
+        n = len(t)
+        self._reserve(0, n)
+        rows = self.levels[0][self.counts[0] : self.counts[0] + n]
+        rows[:, 0] = t
+        rows[:, 1] = v
+        rows[:, 2] = v
+        self.counts[0] += n
+
+    def update(self):
+        factor = self.FACTOR
+        level = 0
+        while self.counts[level] // factor > (self.counts[level + 1] if level + 1 < len(self.counts) else 0):
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty((max(len(self.levels[level]) // factor, 16), 3)))
+                self.counts.append(0)
+            done, complete = self.counts[level + 1], self.counts[level] // factor
+            groups = self.levels[level][done * factor : complete * factor].reshape(-1, factor, 3)
+            self._reserve(level + 1, complete - done)
+            rows = self.levels[level + 1][done:complete]
+            rows[:, 0] = groups[:, 0, 0]
+            rows[:, 1] = groups[:, :, 1].min(axis=1)
+            rows[:, 2] = groups[:, :, 2].max(axis=1)
+            self.counts[level + 1] = complete
+            level += 1
+
+    def query(self, x0: float, x1: float, pixels: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Points to draw ``[x0, x1]`` on ``pixels`` columns: raw samples or min/max pairs per bucket."""
+        self.update()
+        total = self.counts[0]
+        if not total:
+            return np.empty(0), np.empty(0)
+        times = self.levels[0][:total, 0]
+        # по соседней точке за краями, чтобы линия доходила до границ окна
+        i0 = max(int(np.searchsorted(times, x0, "left")) - 1, 0)
+        i1 = min(int(np.searchsorted(times, x1, "right")) + 1, total)
+        level = 0
+        while level + 1 < len(self.levels) and (i1 - i0) / self.FACTOR**level > pixels:
+            level += 1
+        xs, ys = [], []
+        covered = i0
+        # начинаем с выбранного уровня; хвост, ещё не собранный в его корзины, берём с более подробных
+        for current in range(level, -1, -1):
+            if covered >= i1:
+                break
+            size = self.FACTOR**current
+            start = covered // size
+            end = min(-(-i1 // size), self.counts[current])
+            rows = self.levels[current][start:end]
+            if current:
+                xs.append(np.repeat(rows[:, 0], 2))
+                ys.append(rows[:, 1:].ravel())
+            else:
+                xs.append(rows[:, 0])
+                ys.append(rows[:, 1])
+            covered = max(end * size, covered)
+        return np.concatenate(xs), np.concatenate(ys)
+
+
 class PlotWidget(QtWidgets.QWidget):
     colors = [
         "#1f77b4",
@@ -20,6 +165,12 @@ class PlotWidget(QtWidgets.QWidget):
         "#17becf",
     ]
 
+    # перерисовка не чаще FPS раз в секунду, сколько бы отсчётов ни пришло
+    FPS = 30
+    # маркеры точек и толстую линию рисуем только на коротком окне: на длинном они сливаются,
+    # а линия толщиной 2 px отрисовывается в несколько раз дольше тонкой
+    SYMBOL_LIMIT = 200
+
     def __init__(self, parent):
         super().__init__(parent)
         layout = QtWidgets.QVBoxLayout(self)
@@ -27,6 +178,19 @@ class PlotWidget(QtWidgets.QWidget):
         self.plot = pg.PlotWidget(self)
         self.prepare_plot()
 
+        # channel -> (time, voltage) последних State.plot_window отсчётов
+        self.buffers: Dict[int, RingBuffer] = {}
+        # channel -> вся история измерения, если включён State.plot_history
+        self.pyramids: Dict[int, MinMaxPyramid] = {}
+        self.history = State.plot_history
+        self.curves: Dict[int, pg.PlotDataItem] = {}
+        self.short: Dict[int, bool] = {}
+        self.dirty = False
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(int(1000 / self.FPS))
+        self.timer.timeout.connect(self.render)
+
         layout.addWidget(self.plot)
         self.setLayout(layout)
 
@@ -39,31 +203,101 @@ class PlotWidget(QtWidgets.QWidget):
         self.plot.setLabel("bottom", x_label, **styles)
         self.plot.addLegend()
         self.plot.showGrid(x=True, y=True)
+        plot_item = self.plot.getPlotItem()
+        plot_item.setClipToView(True)
+        plot_item.setDownsampling(auto=True, mode="peak")
+        plot_item.getViewBox().sigXRangeChanged.connect(self.range_changed)
+
+    def range_changed(self):
+        # увеличение/сдвиг пользователем: история перезапрашивается с подходящим уровнем детализации;
+        # при автомасштабе диапазон меняется от самих данных, и они уже перерисованы
+        if self.history and not self.plot.getPlotItem().getViewBox().autoRangeEnabled()[0]:
+            self.dirty = True
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.timer.start()
+
+    def hideEvent(self, event):
+        # скрытое окно не перерисовываем, данные продолжают копиться в буферах
+        self.timer.stop()
+        super().hideEvent(event)
 
     def clear(self):
         self.plot.clear()
+        self.buffers.clear()
+        self.pyramids.clear()
+        self.history = State.plot_history
+        # уровни детализации пирамида строит сама, встроенное прореживание только мешало бы
+        self.plot.getPlotItem().setDownsampling(auto=not self.history, mode="peak")
+        self.curves.clear()
+        self.short.clear()
+        self.dirty = False
 
     def get_plot_items(self):
         plot_item = self.plot.getPlotItem()
         return {item.name(): item for item in plot_item.items}
 
-    def add_plots(self, data: List[Dict]):
-        items = self.get_plot_items()
-        for dat in data:
-            graph_id = f"AI{dat['channel']}"
-            if items.get(graph_id):
-                item = items.get(graph_id)
-                x_data = list(item.xData)
-                x_data.append(dat["time"])
-                y_data = list(item.yData)
-                y_data.append(dat["voltage"])
-                if len(x_data) > State.plot_window:
-                    del x_data[0]
-                    del y_data[0]
-                item.setData(x_data, y_data)
-                continue
-
-            pen = pg.mkPen(color=self.colors[dat["channel"] - 1], width=2)
-            self.plot.plot(
-                [dat["time"]], [dat["voltage"]], name=f"{graph_id}", pen=pen, symbolSize=6, symbolBrush=pen.color()
+    def buffer(self, channel: int) -> RingBuffer:
+        buffer = self.buffers.get(channel)
+        if buffer is None:
+            buffer = self.buffers[channel] = RingBuffer(State.plot_window, 2)
+        return buffer
+
+    def pyramid(self, channel: int) -> MinMaxPyramid:
+        pyramid = self.pyramids.get(channel)
+        if pyramid is None:
+            pyramid = self.pyramids[channel] = MinMaxPyramid()
+        return pyramid
+
+    def add_batch(self, batch: np.ndarray):
+        """
+        Queue a ``MeasureThread.data_batch`` (column 0 is time, column ``i`` is channel ``i``) for the next frame;
+        drawing happens in ``render`` by the timer.
+        """
+        if not len(batch):
+            return
+        for channel in range(1, batch.shape[1]):
+            if self.history:
+                self.pyramid(channel).extend(batch[:, 0], batch[:, channel])
+            else:
+                self.buffer(channel).extend(batch[:, [0, channel]])
+        self.dirty = True
+
+    def render(self):
+        if not self.dirty or self.window().isMinimized():
+            return
+        self.dirty = False
+        if self.history:
+            self.render_history()
+            return
+        for channel, buffer in self.buffers.items():
+            if buffer.capacity != State.plot_window:
+                buffer = self.buffers[channel] = buffer.resize(State.plot_window)
+            view = buffer.view()
+            self.curve(channel, len(view)).setData(view[:, 0], view[:, 1])
+
+    def render_history(self):
+        view_box = self.plot.getPlotItem().getViewBox()
+        if view_box.autoRangeEnabled()[0]:
+            x0, x1 = -np.inf, np.inf
+        else:
+            x0, x1 = view_box.viewRange()[0]
+        pixels = max(int(view_box.width()), 100)
+        for channel, pyramid in self.pyramids.items():
+            x, y = pyramid.query(x0, x1, pixels)
+            self.curve(channel, len(x)).setData(x, y)
+
+    def curve(self, channel: int, points: int) -> pg.PlotDataItem:
+        short = points <= self.SYMBOL_LIMIT
+        curve = self.curves.get(channel)
+        color = self.colors[(channel - 1) % len(self.colors)]
+        if curve is None:
+            curve = self.curves[channel] = self.plot.plot(
+                name=f"AI{channel}", symbolSize=6, symbolBrush=pg.mkBrush(color), symbolPen=None
             )
+        if self.short.get(channel) != short:
+            self.short[channel] = short
+            curve.setPen(pg.mkPen(color=color, width=2 if short else 1))
+            curve.setSymbol("o" if short else None)
+        return curve
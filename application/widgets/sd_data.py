@@ -3,12 +3,13 @@ import logging
 import os
 from typing import List
 
-from PyQt5 import QtWidgets
+from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtCore import QThread, pyqtSignal
 
-from api import EspAdc
+from api import SessionManager
 from api.constants import SOCKET
 from application.mixins.log_mixin import LogMixin
+from store.recording import RecordingConverter
 from store.state import State
 
 logger = logging.getLogger(__name__)
@@ -23,7 +24,7 @@ class DeleteThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
                 if not self.file.startswith("/"):
                     self.file = "/" + self.file
                 response = daq.delete_file(self.file)
@@ -38,29 +39,54 @@ class DownloadThread(QThread):
     log = pyqtSignal(dict)
     progress = pyqtSignal(int, int)  # downloaded, total
 
-    def __init__(self, file: str, target_dir: str, parent):
+    def __init__(self, file: str, target_dir: str, parent, convert: bool = False):
         self.file = file
         self.target_dir = target_dir
+        self.convert = convert
         super().__init__(parent)
 
     def run(self):
+        converter = None
+        ok = False
         try:
             assert State.adapter == SOCKET, "Download use only Socket"
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
                 target_path = os.path.join(self.target_dir, os.path.basename(self.file))
                 self.log.emit({"type": "info", "msg": f"Downloading to {target_path}"})
+                if self.convert:
+                    # HDF5 собирается параллельно с загрузкой, отдельный проход по файлу не нужен
+                    converter = RecordingConverter(
+                        os.path.splitext(target_path)[0] + ".h5", attrs={"file": self.file, "comment": "SD recording"}
+                    )
                 ok, response = daq.download_file(
                     self.file,
                     on_progress=self._emit_progress,
                     chunk_size=128 * 1024,
                     dest_path=target_path,
+                    on_data=converter.on_data if converter is not None else None,
                 )
                 log_type = "error" if not ok else "info"
                 self.log.emit({"type": log_type, "msg": response})
+                if daq.last_download is not None:
+                    logger.info(f"[{self.__class__.__name__}.run] Download stats: {daq.last_download.as_dict()}")
         except Exception as e:
             self.log.emit({"type": "error", "msg": str(e)})
+        if converter is not None:
+            self._finish_conversion(converter, ok)
         self.finished.emit()
 
+    def _finish_conversion(self, converter: RecordingConverter, ok: bool):
+        try:
+            converter.close()
+        except Exception as e:
+            self.log.emit({"type": "error", "msg": f"HDF5 conversion failed: {e}"})
+            ok = False
+        if ok:
+            self.log.emit({"type": "info", "msg": f"Converted {converter.rows} rows to {converter.path}"})
+        elif os.path.isfile(converter.path):
+            # неполный HDF5 не оставляем, его пересоберёт следующая загрузка
+            os.unlink(converter.path)
+
     def _emit_progress(self, downloaded: int, total: int):
         self.progress.emit(downloaded, total)
 
@@ -74,7 +100,7 @@ class GetFilesThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
                 response = daq.get_files()
                 log_type = "error" if "Error" in response else "info"
                 self.log.emit({"type": log_type, "msg": response})
@@ -101,7 +127,15 @@ class SdData(QtWidgets.QWidget, LogMixin):
         self.btn_get_files = QtWidgets.QPushButton("Get files list", self)
         self.btn_get_files.clicked.connect(self.get_files)
 
+        self.convert_hdf5 = QtWidgets.QCheckBox("Convert to HDF5", self)
+        self.convert_hdf5.setToolTip(
+            "Parse the recording into an .h5 file next to the download while it is transferred"
+        )
+        self.convert_hdf5.setChecked(State.convert_hdf5)
+        self.convert_hdf5.stateChanged.connect(self.set_convert_hdf5)
+
         hlayout_buttons.addWidget(self.btn_get_files)
+        hlayout_buttons.addWidget(self.convert_hdf5)
 
         layout.addLayout(hlayout_buttons)
         layout.addWidget(self.scroll_files)
@@ -151,7 +185,9 @@ class SdData(QtWidgets.QWidget, LogMixin):
         target_dir = QtWidgets.QFileDialog.getExistingDirectory(self, "Select folder to save")
         if not target_dir:
             return
-        self.thread_download = DownloadThread(parent=self, file=file, target_dir=target_dir)
+        self.thread_download = DownloadThread(
+            parent=self, file=file, target_dir=target_dir, convert=self.convert_hdf5.isChecked()
+        )
         btn_download = getattr(self, f"btn_download_{ind}")
         progress_dialog = QtWidgets.QProgressDialog(f"Downloading {file}...", "Cancel", 0, 100, self)
         progress_dialog.setWindowTitle("Download")
@@ -180,6 +216,10 @@ class SdData(QtWidgets.QWidget, LogMixin):
         self.thread_download.start()
         btn_download.setEnabled(False)
 
+    @staticmethod
+    def set_convert_hdf5(state):
+        State.convert_hdf5 = state == QtCore.Qt.CheckState.Checked
+
     def delete_file(self, file: str, ind: int):
         dlg = QtWidgets.QMessageBox(self)
         dlg.setWindowTitle("Deleting file")
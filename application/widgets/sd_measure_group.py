@@ -1,10 +1,13 @@
 import logging
+import time
 from datetime import datetime
+from typing import Optional
 
+import numpy as np
 from PyQt5 import QtWidgets
 from PyQt5.QtCore import QThread, pyqtSignal
 
-from api import EspAdc
+from api import SessionManager
 from application.mixins.log_mixin import LogMixin
 from store.state import State
 
@@ -21,7 +24,7 @@ class StartThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
                 response = daq.start_record(self.file)
                 log_type = "error" if "Error" in response else "info"
                 self.log.emit({"type": log_type, "msg": response})
@@ -38,7 +41,7 @@ class StopThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
                 response = daq.stop_record()
                 log_type = "error" if "Error" in response else "info"
                 self.log.emit({"type": log_type, "msg": response})
@@ -55,15 +58,100 @@ class CheckStatusThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
-                response = daq.check_recording_status()
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
+                status = daq.get_status()
+                response = status["recording"]
                 log_type = "error" if "Error" in response else "info"
                 self.log.emit({"type": log_type, "msg": response})
+                self.log.emit({"type": "info", "msg": f"IP: {status['ip']}; files on SD: {len(status['files'])}"})
         except Exception as e:
             self.log.emit({"type": "error", "msg": str(e)})
         self.finished.emit()
 
 
+class TailThread(QThread):
+    """
+    Live view of the recording in progress without disturbing it. The firmware puts every sample it records
+    into the in-RAM ring of ``adcSince`` as well, so the tail polls that ring (``EspAdc.read_since``) and never
+    touches the card or the file: no early SD flush, no ``hostFile`` transfer that would close the connection.
+    The ring holds RT_BUFFER_SIZE samples, ``TAIL_INTERVAL`` keeps well inside it; the first poll shows
+    what the ring already holds. Whether the recording still runs is checked with ``checkRecording``, a flag read.
+    """
+
+    # пакеты в формате MeasureThread.data_batch
+    data_batch = pyqtSignal(object)
+    log = pyqtSignal(dict)
+
+    TAIL_INTERVAL = 0.1
+    STATUS_INTERVAL = 1
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.running = True
+        self.cursor = None
+        self.lost = 0
+        self.start_ts = None
+
+    def stop(self):
+        self.running = False
+
+    @staticmethod
+    def recording_file(daq) -> Optional[str]:
+        prefix = "Recording to "
+        status = daq.check_recording_status()
+        return status[len(prefix) :].strip().lstrip("/") if status.startswith(prefix) else None
+
+    def run(self):
+        try:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
+                file = self.recording_file(daq)
+            if file is None:
+                self.log.emit({"type": "warning", "msg": "Not recording, nothing to tail"})
+                self.finished.emit()
+                return
+            self.log.emit({"type": "info", "msg": f"Tailing {file}"})
+            checked = time.monotonic()
+            while self.running:
+                # сессия берётся на один опрос, чтобы остальные команды не ждали конца просмотра
+                with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
+                    # курсор принадлежит потоку: общий экземпляр могут опрашивать и другие
+                    daq.since_cursor = self.cursor
+                    result = daq.read_since()
+                    self.cursor = daq.since_cursor
+                    recording = True
+                    if time.monotonic() - checked >= self.STATUS_INTERVAL:
+                        checked = time.monotonic()
+                        recording = self.recording_file(daq) == file
+                if result is None:
+                    self.log.emit({"type": "error", "msg": "The device does not serve adcSince (ADC not ready?)"})
+                    break
+                self.lost += result["lost"]
+                self.emit_rows(result["ts"], result["data"])
+                if not recording:
+                    msg = f"Recording of {file} finished"
+                    if self.lost:
+                        msg += f", {self.lost} samples were overwritten in the ring before they were shown"
+                    self.log.emit({"type": "info", "msg": msg})
+                    break
+                deadline = time.monotonic() + self.TAIL_INTERVAL
+                while self.running and time.monotonic() < deadline:
+                    time.sleep(0.02)
+        except Exception as e:
+            self.log.emit({"type": "error", "msg": str(e)})
+        self.finished.emit()
+
+    def emit_rows(self, ts: np.ndarray, data: np.ndarray):
+        if not len(ts):
+            return
+        if self.start_ts is None:
+            self.start_ts = int(ts[0])
+        batch = np.empty((len(ts), 4))
+        # ts — uint32 миллисекунды устройства, разность берём в целых, чтобы не потерять точность
+        batch[:, 0] = (ts.astype(np.int64) - self.start_ts) / 1000
+        batch[:, 1:] = data
+        self.data_batch.emit(batch)
+
+
 class InitSdThread(QThread):
     log = pyqtSignal(dict)
 
@@ -73,7 +161,7 @@ class InitSdThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
                 if self.init:
                     response = daq.init_sd()
                 else:
@@ -110,9 +198,16 @@ class SdMeasureGroup(QtWidgets.QGroupBox, LogMixin):
         self.btn_deinit_sd = QtWidgets.QPushButton("Deinit SD", self)
         self.btn_deinit_sd.clicked.connect(lambda: self.init_sd(False))
 
+        self.btn_tail = QtWidgets.QPushButton("Live tail", self)
+        self.btn_tail.setToolTip("Show data appended to the current recording without stopping it")
+        self.btn_tail.setCheckable(True)
+        self.btn_tail.toggled.connect(self.tail)
+        self.thread_tail = None
+
         hlayout_buttons.addWidget(self.btn_start)
         hlayout_buttons.addWidget(self.btn_stop)
         hlayout_buttons.addWidget(self.btn_check_status)
+        hlayout_buttons.addWidget(self.btn_tail)
         hlayout_buttons_sd.addWidget(self.btn_init_sd)
         hlayout_buttons_sd.addWidget(self.btn_deinit_sd)
 
@@ -151,6 +246,29 @@ class SdMeasureGroup(QtWidgets.QGroupBox, LogMixin):
         self.thread_check_status.start()
         self.btn_check_status.setEnabled(False)
 
+    def tail(self, checked: bool):
+        if not checked:
+            if self.thread_tail is not None:
+                self.thread_tail.stop()
+            return
+        parent = self.parent()
+        if hasattr(parent, "plot_widget"):
+            parent.plot_widget.clear()
+        if hasattr(parent, "monitor_widget"):
+            parent.monitor_widget.reset_values()
+        self.thread_tail = TailThread(parent=self)
+        self.thread_tail.data_batch.connect(self.plot_data)
+        self.thread_tail.log.connect(self.set_log)
+        self.thread_tail.finished.connect(lambda: self.btn_tail.setChecked(False))
+        self.thread_tail.start()
+
+    def plot_data(self, batch: np.ndarray):
+        parent = self.parent()
+        if State.is_plot_data and hasattr(parent, "plot_widget"):
+            parent.plot_widget.add_batch(batch)
+        if hasattr(parent, "monitor_widget"):
+            parent.monitor_widget.add_batch(batch)
+
     def init_sd(self, init: bool):
         self.thread_init_sd = InitSdThread(
             parent=self,
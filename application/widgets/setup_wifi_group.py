@@ -2,11 +2,12 @@ import logging
 import time
 
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
 
-from api import EspAdc
+from api import SessionManager
 from api.constants import WIFI_TYPES, WIFI
 
+from store.discovery import DiscoveryCache
 from store.state import State
 
 logger = logging.getLogger(__name__)
@@ -23,14 +24,17 @@ class SetUpWifiThread(QThread):
 
     def run(self):
         try:
-            with EspAdc(host=State.host, port=State.port, adapter=State.adapter) as daq:
-                daq.set_wifi(self.wifi, self.ssid, self.pwd)
-                self.log.emit({"type": "info", "msg": "Setting up wifi ..."})
-                time.sleep(5)
-                State.wifi = self.wifi
-                State.ssid = self.ssid
-                State.pwd = self.pwd
-                self.log.emit({"type": "info", "msg": f"Wifi {self.wifi} {self.ssid} is Set up"})
+            with SessionManager.session(host=State.host, port=State.port, adapter=State.adapter) as daq:
+                response = daq.set_wifi(self.wifi, self.ssid, self.pwd)
+            self.log.emit({"type": "info", "msg": f"Setting up wifi ... {response}"})
+            if "Restarting" in response:
+                # плата перезагружается: общее соединение мертво, следующая команда откроет новое
+                SessionManager.close(host=State.host, port=State.port, adapter=State.adapter)
+            time.sleep(5)
+            State.wifi = self.wifi
+            State.ssid = self.ssid
+            State.pwd = self.pwd
+            self.log.emit({"type": "info", "msg": f"Wifi {self.wifi} {self.ssid} is Set up"})
         except Exception as e:
             self.log.emit({"type": "error", "msg": str(e)})
         self.finished.emit()
@@ -38,17 +42,31 @@ class SetUpWifiThread(QThread):
 
 class CheckIPThread(QThread):
     ip = pyqtSignal(str)
+    progress = pyqtSignal(int, int)  # probed, total
     log = pyqtSignal(dict)
 
+    SCAN_CONCURRENCY = 64
+    SCAN_TIMEOUT = 0.5
+
     def __init__(self, parent, mac: str):
         super().__init__(parent)
         self.mac = mac
 
     def run(self):
         try:
-            from api.utils import find_ip_by_mac
-
-            ip = find_ip_by_mac(self.mac)
+            cache = DiscoveryCache()
+            cached = cache.get(self.mac)
+            if cached is not None:
+                # известный адрес показываем сразу, проверка займёт один запрос
+                self.ip.emit(f"{cached['ip']} (checking...)")
+            port = int(State.port) if str(State.port).isdigit() else 80
+            ip = cache.lookup(
+                self.mac,
+                port=port,
+                concurrency=self.SCAN_CONCURRENCY,
+                timeout=self.SCAN_TIMEOUT,
+                on_progress=self.progress.emit,
+            )
             if not ip:
                 self.ip.emit("Undefined")
                 self.log.emit({"type": "error", "msg": f"IP not found for MAC {self.mac}"})
@@ -60,13 +78,35 @@ class CheckIPThread(QThread):
         self.finished.emit()
 
 
+class RefreshDiscoveryThread(QThread):
+    """Revalidate all boards of the discovery cache in the background."""
+
+    ips = pyqtSignal(dict)
+    log = pyqtSignal(dict)
+
+    def run(self):
+        try:
+            ips = DiscoveryCache().refresh()
+            self.ips.emit(ips)
+            lost = [mac for mac, ip in ips.items() if ip is None]
+            if lost:
+                self.log.emit({"type": "warning", "msg": f"Boards not found: {', '.join(lost)}"})
+        except Exception as e:
+            self.log.emit({"type": "error", "msg": str(e)})
+        self.finished.emit()
+
+
 class SetUpWifiGroup(QtWidgets.QGroupBox):
+    # период фоновой проверки известных плат, с
+    REFRESH_INTERVAL = 300
+
     def __init__(self, parent):
         super().__init__(parent)
 
         layout = QtWidgets.QFormLayout()
 
         self.thread_setup_wifi = None
+        self.thread_check_ip = None
 
         self.setTitle("SetUp WiFi")
 
@@ -103,6 +143,31 @@ class SetUpWifiGroup(QtWidgets.QGroupBox):
 
         self.setLayout(layout)
 
+        self.thread_refresh = None
+        self.timer_refresh = QTimer(self)
+        self.timer_refresh.setInterval(self.REFRESH_INTERVAL * 1000)
+        self.timer_refresh.timeout.connect(self.refresh_discovery)
+        self.timer_refresh.start()
+        cached = DiscoveryCache().get(State.mac) if State.mac else None
+        if cached is not None:
+            self.ip.setText(cached["ip"])
+            self.refresh_discovery()
+
+    def refresh_discovery(self):
+        if self.thread_refresh is not None and self.thread_refresh.isRunning():
+            return
+        if self.thread_check_ip is not None and self.thread_check_ip.isRunning():
+            return
+        self.thread_refresh = RefreshDiscoveryThread(self)
+        self.thread_refresh.ips.connect(self.show_refreshed_ip)
+        self.thread_refresh.log.connect(self.set_log)
+        self.thread_refresh.start()
+
+    def show_refreshed_ip(self, ips: dict):
+        key = DiscoveryCache.key(self.mac.text())
+        if key in ips:
+            self.ip.setText(ips[key] or "Undefined")
+
     def setup_wifi(self):
         self.thread_setup_wifi = SetUpWifiThread(
             parent=self,
@@ -120,6 +185,7 @@ class SetUpWifiGroup(QtWidgets.QGroupBox):
         self.thread_check_ip = CheckIPThread(parent=self, mac=State.mac)
         self.thread_check_ip.finished.connect(lambda: self.btn_check_ip.setEnabled(True))
         self.thread_check_ip.ip.connect(self.ip.setText)
+        self.thread_check_ip.progress.connect(lambda done, total: self.ip.setText(f"Scanning {done}/{total}..."))
         self.thread_check_ip.log.connect(self.set_log)
         self.thread_check_ip.start()
         self.btn_check_ip.setEnabled(False)
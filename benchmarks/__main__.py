@@ -0,0 +1,60 @@
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+
+from benchmarks.suite import compare, run_all
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the api layer against the local firmware simulator",
+    )
+    parser.add_argument("-o", "--output", default="benchmarks/results.json", help="Where to write the results JSON")
+    parser.add_argument("-b", "--baseline", default="benchmarks/baseline.json", help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("-t", "--threshold", default=0.2, type=float, help="Allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for a smoke run")
+    parser.add_argument("--latency", default=0.0, type=float, help="Simulated reply latency, s")
+    parser.add_argument("--bandwidth", default=None, type=float, help="Simulated send rate limit, bytes/s")
+    args = parser.parse_args()
+
+    metrics = run_all(quick=args.quick, latency=args.latency, bandwidth=args.bandwidth)
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": metrics,
+    }
+    for name, value in metrics.items():
+        print(f"{name:45s} {value['value']:12.3f} {value['unit']}")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["metrics"]
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create it")
+        return 0
+
+    regressions = compare(metrics, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions above {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import os
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from api import EspAdc
+from api.constants import SOCKET
+from api.protocol import FRAME_HEADER, decode_records, encode_frame, parse_header, to_mv
+from api.simulator import EspAdcSimulator
+from api.stream import SampleStream
+
+HIGHER = "higher"
+LOWER = "lower"
+
+
+def metric(value: float, unit: str, better: str) -> Dict:
+    return {"value": float(value), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix: str, seconds: List[float]) -> Dict[str, Dict]:
+    ms = np.array(seconds, dtype=float) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        f"{prefix}.p50": metric(p50, "ms", LOWER),
+        f"{prefix}.p90": metric(p90, "ms", LOWER),
+        f"{prefix}.p99": metric(p99, "ms", LOWER),
+    }
+
+
+def _timed(func: Callable, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_read_data(sim: EspAdcSimulator, samples: int = 2000, sustained: float = 2.0) -> Dict[str, Dict]:
+    """Latency percentiles of single ``read_data`` calls and the max rate of back-to-back calls."""
+    results = {}
+    with EspAdc(host=sim.host, port=sim.port, adapter=SOCKET) as daq:
+        daq.read_data()
+        results.update(latency_metrics("read_data.latency", _timed(daq.read_data, samples)))
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < sustained:
+            daq.read_data()
+            count += 1
+        results["read_data.qps"] = metric(count / (time.perf_counter() - started), "1/s", HIGHER)
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < sustained:
+            count += len(daq.read_data_many(64))
+        results["read_data_many.qps"] = metric(count / (time.perf_counter() - started), "1/s", HIGHER)
+    return results
+
+
+def bench_decode(batch: int = 32, repeat: int = 2000) -> Dict[str, Dict]:
+    """Host-side cost per sample of the text and the binary sample formats (no network)."""
+    lines = [f"S {i}; {i * 10}; 1234.5; -234.5; 12.0".encode() for i in range(batch)]
+    frame = encode_frame([(i, i * 10, 9876, -1876, 96) for i in range(batch)], 1, batch)
+
+    def decode_text():
+        return [SampleStream.parse(line) for line in lines]
+
+    def decode_binary():
+        header = parse_header(frame[: FRAME_HEADER.size])
+        return to_mv(decode_records(frame[FRAME_HEADER.size :]), header.gain)
+
+    text = np.median(_timed(decode_text, repeat)) / batch
+    binary = np.median(_timed(decode_binary, repeat)) / batch
+    return {
+        "decode.text.per_sample": metric(text * 1e6, "us", LOWER),
+        "decode.binary.per_sample": metric(binary * 1e6, "us", LOWER),
+        "decode.text.bytes_per_sample": metric(sum(len(line) + 1 for line in lines) / batch, "B", LOWER),
+        "decode.binary.bytes_per_sample": metric(len(frame) / batch, "B", LOWER),
+    }
+
+
+def bench_get_files(sim: EspAdcSimulator, counts=(1, 10, 100, 500), repeat: int = 50) -> Dict[str, Dict]:
+    """``get_files`` cost as a function of the number of files on the card."""
+    results = {}
+    existing = 0
+    for count in counts:
+        for i in range(existing, count):
+            with open(os.path.join(sim.sd_dir, f"bench_{i:05d}.txt"), "w") as f:
+                f.write("0; 0.0; 0.0; 0.0\n")
+        existing = max(existing, count)
+        with EspAdc(host=sim.host, port=sim.port, adapter=SOCKET) as daq:
+            timings = _timed(daq.get_files, repeat)
+        results[f"get_files.{count}_files.p50"] = metric(np.median(timings) * 1000, "ms", LOWER)
+    for i in range(existing):
+        os.unlink(os.path.join(sim.sd_dir, f"bench_{i:05d}.txt"))
+    return results
+
+
+def bench_download(
+    sim: EspAdcSimulator,
+    file_sizes=(1 << 20, 16 << 20),
+    chunk_sizes=(16 << 10, 128 << 10, 1 << 20),
+    dest_dir: str = None,
+) -> Dict[str, Dict]:
+    """``download_file`` throughput for every file size / chunk size pair."""
+    results = {}
+    dest_dir = dest_dir or sim.sd_dir
+    for size in file_sizes:
+        name = f"bench_{size >> 10}k.txt"
+        with open(os.path.join(sim.sd_dir, name), "wb") as f:
+            f.write(os.urandom(size))
+        for chunk_size in chunk_sizes:
+            dest = os.path.join(dest_dir, f"download_{name}")
+            with EspAdc(host=sim.host, port=sim.port, adapter=SOCKET) as daq:
+                started = time.perf_counter()
+                ok, msg = daq.download_file(name, chunk_size=chunk_size, dest_path=dest)
+                elapsed = time.perf_counter() - started
+            if not ok:
+                raise RuntimeError(msg)
+            os.unlink(dest)
+            results[f"download.{size >> 10}k.chunk_{chunk_size >> 10}k"] = metric(
+                size / elapsed / (1 << 20), "MB/s", HIGHER
+            )
+        os.unlink(os.path.join(sim.sd_dir, name))
+    return results
+
+
+def bench_connect(sim: EspAdcSimulator, repeat: int = 200) -> Dict[str, Dict]:
+    """Cost of opening a connection, doing one query and closing it."""
+
+    def connect_query_close():
+        with EspAdc(host=sim.host, port=sim.port, adapter=SOCKET) as daq:
+            daq.get_ip()
+
+    return latency_metrics("connect_query_close", _timed(connect_query_close, repeat))
+
+
+def run_all(quick: bool = False, latency: float = 0.0, bandwidth: float = None) -> Dict[str, Dict]:
+    results = {}
+    with EspAdcSimulator(latency=latency, bandwidth=bandwidth, seed=0) as sim:
+        time.sleep(0.1)
+        if quick:
+            results.update(bench_read_data(sim, samples=300, sustained=0.5))
+            results.update(bench_decode(repeat=200))
+            results.update(bench_get_files(sim, counts=(1, 100), repeat=10))
+            results.update(bench_download(sim, file_sizes=(1 << 20,), chunk_sizes=(16 << 10, 1 << 20)))
+            results.update(bench_connect(sim, repeat=30))
+        else:
+            results.update(bench_read_data(sim))
+            results.update(bench_decode())
+            results.update(bench_get_files(sim))
+            results.update(bench_download(sim))
+            results.update(bench_connect(sim))
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Return a description of every metric that is worse than the baseline by more than ``threshold``."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / abs(base["value"])
+        worse = -change if current["better"] == HIGHER else change
+        if worse > threshold:
+            regressions.append(
+                f"{name}: {current['value']:.3f} {current['unit']} vs baseline {base['value']:.3f} ({worse:+.1%} worse)"
+            )
+    return regressions
@@ -0,0 +1,97 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+
+from store.recording import convert_recording, is_converted
+
+
+def collect_files(inputs, pattern):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(sorted(glob.glob(os.path.join(item, "**", pattern), recursive=True)))
+        else:
+            files.append(item)
+    return files
+
+
+def output_path(path, output_dir):
+    name = os.path.splitext(os.path.basename(path))[0] + ".h5"
+    return os.path.join(output_dir or os.path.dirname(path), name)
+
+
+def convert_one(task):
+    path, output, force, writer_kwargs = task
+    size = os.path.getsize(path)
+    if not force and is_converted(path, output):
+        return path, "skipped", size, 0, 0.0, ""
+    start = time.perf_counter()
+    try:
+        rows = convert_recording(path, output, **writer_kwargs)
+    except Exception as e:
+        return path, "failed", size, 0, time.perf_counter() - start, str(e)
+    return path, "converted", size, rows, time.perf_counter() - start, ""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="EspAdc converter", description="Convert SD text recordings (data_*.txt) to HDF5 in parallel"
+    )
+    parser.add_argument("inputs", nargs="+", help="Recording files or folders with them")
+    parser.add_argument(
+        "-o", "--output-dir", default=None, help="Folder for .h5 files (next to the source by default)"
+    )
+    parser.add_argument("-p", "--pattern", default="*.txt", help="File mask for folders")
+    parser.add_argument("-j", "--jobs", default=os.cpu_count() or 1, type=int, help="Worker processes")
+    parser.add_argument("-f", "--force", action="store_true", help="Convert even if the .h5 is up to date")
+    parser.add_argument("--read-size", default=8, type=int, help="Read block, MB")
+    parser.add_argument("--chunk-rows", default=64 * 1024, type=int, help="HDF5 chunk, rows")
+    parser.add_argument("--compression", default="gzip", choices=["gzip", "lzf", "none"])
+    parser.add_argument("--level", default=4, type=int, help="gzip level")
+    args = parser.parse_args()
+
+    files = collect_files(args.inputs, args.pattern)
+    if not files:
+        print("No recordings found")
+        return
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    writer_kwargs = {
+        "read_size": args.read_size * 1024 * 1024,
+        "chunk_rows": args.chunk_rows,
+        "compression": None if args.compression == "none" else args.compression,
+        "compression_opts": args.level if args.compression == "gzip" else None,
+    }
+    tasks = [(path, output_path(path, args.output_dir), args.force, writer_kwargs) for path in files]
+
+    totals = {"converted": 0, "skipped": 0, "failed": 0}
+    converted_bytes = 0
+    converted_rows = 0
+    start = time.perf_counter()
+    jobs = max(1, min(args.jobs, len(tasks)))
+    # файлы независимы: каждый процесс читает, разбирает и пишет свой файл целиком
+    with multiprocessing.Pool(jobs) as pool:
+        for i, (path, status, size, rows, seconds, error) in enumerate(pool.imap_unordered(convert_one, tasks), 1):
+            totals[status] += 1
+            if status == "converted":
+                converted_bytes += size
+                converted_rows += rows
+                print(f"[{i}/{len(tasks)}] {path}: {rows} rows, {size / (1024 * 1024) / seconds:.1f} MB/s")
+            elif status == "failed":
+                print(f"[{i}/{len(tasks)}] {path}: Error: {error}")
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\nConverted {totals['converted']}, skipped {totals['skipped']} (up to date), failed {totals['failed']} "
+        f"in {elapsed:.2f} s with {jobs} processes"
+    )
+    if converted_bytes and elapsed > 0:
+        print(
+            f"Throughput: {converted_bytes / (1024 * 1024) / elapsed:.1f} MB/s, {converted_rows / elapsed:,.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
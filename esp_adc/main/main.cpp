@@ -1,4 +1,6 @@
 #include <algorithm>
+#include <cctype>
+#include <cmath>
 #include <cstdio>
 #include <cstdlib>
 #include <cstring>
@@ -64,6 +66,10 @@ constexpr int SD_BUFFER_SIZE = 860;
 constexpr int RT_BUFFER_SIZE = 256;
 constexpr int CHUNK_SIZE = 16384;
 constexpr int OUTPUT_HZ = 100;
+constexpr int STREAM_POLL_MS = 10;
+constexpr int STREAM_MAX_BATCH = 32;
+constexpr uint8_t FRAME_MAGIC[2] = {0xAD, 0xC0};
+constexpr uint8_t FRAME_VERSION = 1;
 constexpr int OVERSAMPLE = 1;
 constexpr float EMA_ALPHA = 0.25f;
 
@@ -97,12 +103,32 @@ struct Ads1115 {
 
 // --- Runtime state ---
 struct DataPoint {
+    uint32_t seq;
     uint32_t timestamp_ms;
     float adc0;
     float adc1;
     float adc2;
 };
 
+// Бинарный кадр (режим format=bin): заголовок и count записей, little-endian без выравнивания.
+// Отсчёты передаются сырыми кодами АЦП, в мВ их переводит хост по индексу усиления из заголовка.
+struct __attribute__((packed)) FrameHeader {
+    uint8_t magic[2];
+    uint8_t version;
+    uint8_t gain;
+    uint16_t count;
+    uint32_t head_seq;
+};
+
+struct __attribute__((packed)) FrameRecord {
+    uint32_t seq;
+    uint32_t timestamp_ms;
+    int16_t raw[3];
+};
+
+static_assert(sizeof(FrameHeader) == 10, "FrameHeader must be 10 bytes");
+static_assert(sizeof(FrameRecord) == 14, "FrameRecord must be 14 bytes");
+
 static Ads1115 g_ads{I2C_PORT, ADS_I2C_ADDR, AdsGain::GAIN_ONE, AdsDataRate::RATE_860SPS};
 static volatile bool sampling_enabled = false;
 static volatile bool is_recording = false;
@@ -117,6 +143,7 @@ static SemaphoreHandle_t i2c_mutex = nullptr;
 
 static DataPoint rt_buffer[RT_BUFFER_SIZE];
 static volatile int rt_head = 0;
+static volatile uint32_t rt_seq = 0; // номер следующего отсчёта; у последнего записанного seq = rt_seq - 1
 static volatile bool rt_has_data = false;
 static portMUX_TYPE rt_mux = portMUX_INITIALIZER_UNLOCKED;
 
@@ -453,8 +480,9 @@ static void read_adc(float *result) {
 // ======================= Buffers =====================================
 static inline void start_sampling() { sampling_enabled = true; }
 
-static void rt_push_sample(const DataPoint &dp) {
+static void rt_push_sample(DataPoint &dp) {
     portENTER_CRITICAL(&rt_mux);
+    dp.seq = rt_seq++;
     rt_buffer[rt_head] = dp;
     rt_head = (rt_head + 1) % RT_BUFFER_SIZE;
     rt_has_data = true;
@@ -470,6 +498,25 @@ static bool rt_get_latest(DataPoint &out) {
     return true;
 }
 
+// Копирует отсчёты с seq >= from_seq (не больше max_count); возвращает их число.
+// Если from_seq уже вытеснен из кольцевого буфера, копирование начинается с самого старого доступного.
+static int rt_copy_since(uint32_t from_seq, DataPoint *out, int max_count, uint32_t &head_seq) {
+    portENTER_CRITICAL(&rt_mux);
+    head_seq = rt_seq;
+    const uint32_t available = std::min<uint32_t>(rt_seq, RT_BUFFER_SIZE);
+    const uint32_t oldest = rt_seq - available;
+    if (from_seq < oldest) from_seq = oldest;
+    if (from_seq > rt_seq) from_seq = rt_seq;
+    int count = std::min<int>(static_cast<int>(rt_seq - from_seq), max_count);
+    for (int i = 0; i < count; ++i) {
+        const uint32_t seq = from_seq + i;
+        const int idx = (rt_head - static_cast<int>(rt_seq - seq) + RT_BUFFER_SIZE) % RT_BUFFER_SIZE;
+        out[i] = rt_buffer[idx];
+    }
+    portEXIT_CRITICAL(&rt_mux);
+    return count;
+}
+
 static std::string read_adc_pretty() {
     if (!ads_ready) return "ADS1115 not ready";
     if (!sampling_enabled) start_sampling();
@@ -477,14 +524,42 @@ static std::string read_adc_pretty() {
     if (!rt_get_latest(dp)) {
         float v[3];
         read_adc(v);
-        dp = {static_cast<uint32_t>(esp_timer_get_time() / 1000), v[0], v[1], v[2]};
+        dp = {0, static_cast<uint32_t>(esp_timer_get_time() / 1000), v[0], v[1], v[2]};
         rt_push_sample(dp);
     }
-    char out[96];
-    snprintf(out, sizeof(out), "ADC0: %.1f mV; ADC1: %.1f mV; ADC2: %.1f mV;", dp.adc0, dp.adc1, dp.adc2);
+    // TS и SEQ позволяют клиенту отличить новый отсчёт от повторно прочитанного
+    char out[128];
+    snprintf(out, sizeof(out), "ADC0: %.1f mV; ADC1: %.1f mV; ADC2: %.1f mV; TS: %lu ms; SEQ: %lu;", dp.adc0,
+             dp.adc1, dp.adc2, static_cast<unsigned long>(dp.timestamp_ms), static_cast<unsigned long>(dp.seq));
     return std::string(out);
 }
 
+// Аргумент команды adcSince=<seq>; пустой или некорректный аргумент — с самого старого отсчёта в буфере.
+static uint32_t parse_since_seq(const std::string &command) {
+    return static_cast<uint32_t>(strtoul(command.c_str() + 9, nullptr, 10));
+}
+
+// Все отсчёты из rt_buffer с seq >= from_seq одной строкой: "HEAD <head>;<seq>,<ts>,<a0>,<a1>,<a2>;..."
+// head — seq следующего отсчёта; если первый seq больше запрошенного, клиент отстал больше чем на RT_BUFFER_SIZE.
+static std::string read_adc_since(uint32_t from_seq) {
+    if (!ads_ready) return "ADS1115 not ready";
+    if (!sampling_enabled) start_sampling();
+    std::vector<DataPoint> points(RT_BUFFER_SIZE); // стек задачи команд всего 4 КБ
+    uint32_t head = 0;
+    const int count = rt_copy_since(from_seq, points.data(), RT_BUFFER_SIZE, head);
+    std::string out = "HEAD " + std::to_string(head) + ";";
+    out.reserve(out.size() + count * 40);
+    for (int i = 0; i < count; ++i) {
+        char item[80];
+        const int len = snprintf(item, sizeof(item), "%lu,%lu,%.1f,%.1f,%.1f;",
+                                 static_cast<unsigned long>(points[i].seq),
+                                 static_cast<unsigned long>(points[i].timestamp_ms),
+                                 points[i].adc0, points[i].adc1, points[i].adc2);
+        out.append(item, len);
+    }
+    return out;
+}
+
 // ======================= SD handling =================================
 static esp_err_t init_sd_card() {
     if (sd_mounted) return ESP_OK;
@@ -641,7 +716,9 @@ static std::string delete_file(const std::string &file_name) {
     return "Error: File " + file_name + " not found";
 }
 
-static bool send_file(int client_sock, const std::string &file_name, bool http_mode) {
+// Отдаёт файл начиная с offset: в текстовом режиме заголовок "SIZE <полный размер> OFFSET <offset>\n",
+// в HTTP — 200 OK или 206 Partial Content для запроса с Range. Так прерванную загрузку можно продолжить.
+static bool send_file(int client_sock, const std::string &file_name, bool http_mode, long long offset = 0) {
     if (!sd_mounted) {
         const char *msg = http_mode ? "HTTP/1.1 503 Service Unavailable\r\nContent-Type: text/plain\r\nContent-Length: 15\r\n\r\nSD not mounted"
                                     : "Error: SD not mounted\n";
@@ -665,9 +742,27 @@ static bool send_file(int client_sock, const std::string &file_name, bool http_m
         send(client_sock, msg, strlen(msg), 0);
         return false;
     }
+    const long long size = static_cast<long long>(st.st_size);
+    if (offset < 0 || offset > size || (http_mode && offset > 0 && offset == size)) {
+        if (http_mode) {
+            char msg[160];
+            const int len = snprintf(msg, sizeof(msg),
+                                     "HTTP/1.1 416 Range Not Satisfiable\r\nContent-Range: bytes */%lld\r\n"
+                                     "Content-Length: 0\r\n\r\n", size);
+            send(client_sock, msg, len, 0);
+        } else {
+            const char *msg = "Error: Invalid offset\n";
+            send(client_sock, msg, strlen(msg), 0);
+        }
+        return false;
+    }
     FILE *f = nullptr;
     if (xSemaphoreTake(sd_mutex, pdMS_TO_TICKS(500)) == pdTRUE) {
         f = fopen(path.c_str(), "rb");
+        if (f && offset > 0 && fseek(f, static_cast<long>(offset), SEEK_SET) != 0) {
+            fclose(f);
+            f = nullptr;
+        }
         xSemaphoreGive(sd_mutex);
     }
     if (!f) {
@@ -676,19 +771,32 @@ static bool send_file(int client_sock, const std::string &file_name, bool http_m
         send(client_sock, msg, strlen(msg), 0);
         return false;
     }
-    if (http_mode) {
+    if (http_mode && offset > 0) {
+        char hdr[320];
+        int hdr_len = snprintf(hdr, sizeof(hdr),
+                               "HTTP/1.1 206 Partial Content\r\n"
+                               "Content-Type: application/octet-stream\r\n"
+                               "Content-Length: %lld\r\n"
+                               "Content-Range: bytes %lld-%lld/%lld\r\n"
+                               "Accept-Ranges: bytes\r\n"
+                               "Content-Disposition: attachment; filename=\"%s\"\r\n"
+                               "\r\n",
+                               size - offset, offset, size - 1, size, file_name.c_str());
+        send(client_sock, hdr, hdr_len, 0);
+    } else if (http_mode) {
         char hdr[256];
         int hdr_len = snprintf(hdr, sizeof(hdr),
                                "HTTP/1.1 200 OK\r\n"
                                "Content-Type: application/octet-stream\r\n"
                                "Content-Length: %lld\r\n"
+                               "Accept-Ranges: bytes\r\n"
                                "Content-Disposition: attachment; filename=\"%s\"\r\n"
                                "\r\n",
-                               static_cast<long long>(st.st_size), file_name.c_str());
+                               size, file_name.c_str());
         send(client_sock, hdr, hdr_len, 0);
     } else {
-        char header[64];
-        int hdr_len = snprintf(header, sizeof(header), "SIZE %lld\n", static_cast<long long>(st.st_size));
+        char header[80];
+        int hdr_len = snprintf(header, sizeof(header), "SIZE %lld OFFSET %lld\n", size, offset);
         send(client_sock, header, hdr_len, 0);
     }
     int nodelay = 1;
@@ -702,13 +810,46 @@ static bool send_file(int client_sock, const std::string &file_name, bool http_m
             if (n <= 0) break;
             sent += static_cast<size_t>(n);
         }
+        if (sent < read_bytes) break; // клиент отключился — продолжит с нового смещения
     }
     fclose(f);
     return true;
 }
 
-static void host_file(int client_sock, const std::string &file_name) {
-    send_file(client_sock, file_name, false);
+// hostFile=<name> или hostFile=<name>:<offset>
+static void host_file(int client_sock, const std::string &argument) {
+    const std::string arg = trim(argument);
+    const size_t sep = arg.rfind(':');
+    if (sep == std::string::npos) {
+        send_file(client_sock, arg, false);
+        return;
+    }
+    const std::string offset_str = arg.substr(sep + 1);
+    char *end = nullptr;
+    const long long offset = strtoll(offset_str.c_str(), &end, 10);
+    if (offset_str.empty() || *end != '\0') {
+        const char *msg = "Error: Invalid offset\n";
+        send(client_sock, msg, strlen(msg), 0);
+        return;
+    }
+    send_file(client_sock, arg.substr(0, sep), false, offset);
+}
+
+static bool recv_line(int sock, std::string &out);
+
+// Дочитывает заголовки HTTP-запроса до пустой строки; возвращает начало диапазона из "Range: bytes=<n>-" или 0.
+static long long read_http_range(int client_sock) {
+    long long offset = 0;
+    std::string line;
+    for (int i = 0; i < 32 && recv_line(client_sock, line); ++i) {
+        if (line.empty()) break;
+        std::string lower = line;
+        std::transform(lower.begin(), lower.end(), lower.begin(), ::tolower);
+        if (lower.rfind("range:", 0) != 0) continue;
+        const size_t pos = lower.find("bytes=");
+        if (pos != std::string::npos) offset = strtoll(lower.c_str() + pos + 6, nullptr, 10);
+    }
+    return offset;
 }
 
 static bool handle_http_request(int client_sock, const std::string &request_line) {
@@ -717,6 +858,7 @@ static bool handle_http_request(int client_sock, const std::string &request_line
     const size_t path_end = request_line.find(' ', path_start);
     if (path_end == std::string::npos) return false;
     const std::string path = request_line.substr(path_start, path_end - path_start);
+    const long long range_start = read_http_range(client_sock);
 
     if (path.rfind("/files", 0) == 0) {
         std::string body = list_files_json();
@@ -740,7 +882,7 @@ static bool handle_http_request(int client_sock, const std::string &request_line
 
     if (path.rfind("/download", 0) == 0) {
         const std::string file = query_value(path, "file");
-        send_file(client_sock, file, true);
+        send_file(client_sock, file, true, range_start);
         return true;
     }
 
@@ -849,12 +991,17 @@ static std::string get_ip() {
     return "0.0.0.0";
 }
 
+static void restart_task(void *) {
+    // даём задаче команд отправить ответ клиенту до перезагрузки
+    vTaskDelay(pdMS_TO_TICKS(500));
+    esp_restart();
+}
+
 static void configure_wifi(const std::string &wifi, const std::string &ssid, const std::string &pwd) {
     WifiSettings new_settings{wifi, ssid, pwd};
     save_wifi_settings(new_settings);
     ESP_LOGI(TAG, "WiFi settings saved. Restarting...");
-    vTaskDelay(pdMS_TO_TICKS(200));
-    esp_restart();
+    xTaskCreate(restart_task, "restart", 2048, nullptr, 1, nullptr);
 }
 
 // ======================= Commands ====================================
@@ -866,6 +1013,8 @@ static std::string process_request(const std::string &raw_command) {
     const std::string command = trim(raw_command);
     if (command == "adc") {
         return read_adc_pretty();
+    } else if (command.rfind("adcSince=", 0) == 0) {
+        return read_adc_since(parse_since_seq(command));
     } else if (command == "ip") {
         return get_ip();
     } else if (command == "adsGain") {
@@ -965,7 +1114,7 @@ static void data_collection_task(void *param) {
         if (sampling_enabled && ads_ready) {
             float v[3];
             read_adc(v);
-            DataPoint dp{static_cast<uint32_t>(esp_timer_get_time() / 1000), v[0], v[1], v[2]};
+            DataPoint dp{0, static_cast<uint32_t>(esp_timer_get_time() / 1000), v[0], v[1], v[2]};
             rt_push_sample(dp);
             if (is_recording && sd_mounted) {
                 if (xSemaphoreTake(sd_mutex, pdMS_TO_TICKS(2)) == pdTRUE) {
@@ -1023,6 +1172,133 @@ static bool recv_line(int sock, std::string &out) {
     return true;
 }
 
+static bool send_all(int sock, const char *data, size_t len) {
+    size_t sent = 0;
+    while (sent < len) {
+        const int n = send(sock, data + sent, len - sent, 0);
+        if (n <= 0) return false;
+        sent += static_cast<size_t>(n);
+    }
+    return true;
+}
+
+static bool send_str(int sock, const char *str) {
+    return send_all(sock, str, strlen(str));
+}
+
+static int16_t mv_to_raw(float mv, float lsb_mv) {
+    const long raw = lroundf(mv / lsb_mv);
+    return static_cast<int16_t>(std::max(-32768L, std::min(32767L, raw)));
+}
+
+// Кодирует отсчёты в бинарный кадр. Значения в rt_buffer уже отфильтрованы (EMA) и хранятся в мВ,
+// поэтому коды пересчитываются по текущему усилению — точность не хуже одного младшего разряда.
+static size_t encode_frame(const DataPoint *points, int count, uint32_t head_seq, uint8_t *out) {
+    const float lsb = ads_gain_lsb_mv(g_ads.gain);
+    FrameHeader header{{FRAME_MAGIC[0], FRAME_MAGIC[1]}, FRAME_VERSION,
+                       static_cast<uint8_t>(ads_gain_to_index(g_ads.gain)), static_cast<uint16_t>(count), head_seq};
+    memcpy(out, &header, sizeof(header));
+    for (int i = 0; i < count; ++i) {
+        FrameRecord record{points[i].seq, points[i].timestamp_ms,
+                           {mv_to_raw(points[i].adc0, lsb), mv_to_raw(points[i].adc1, lsb), mv_to_raw(points[i].adc2, lsb)}};
+        memcpy(out + sizeof(header) + i * sizeof(record), &record, sizeof(record));
+    }
+    return sizeof(FrameHeader) + count * sizeof(FrameRecord);
+}
+
+// Ответ на adc в режиме format=bin: кадр с одним последним отсчётом.
+static bool send_adc_frame(int sock) {
+    if (!ads_ready) return send_str(sock, "ADS1115 not ready\n");
+    if (!sampling_enabled) start_sampling();
+    DataPoint dp;
+    if (!rt_get_latest(dp)) {
+        float v[3];
+        read_adc(v);
+        dp = {0, static_cast<uint32_t>(esp_timer_get_time() / 1000), v[0], v[1], v[2]};
+        rt_push_sample(dp);
+    }
+    portENTER_CRITICAL(&rt_mux);
+    const uint32_t head = rt_seq;
+    portEXIT_CRITICAL(&rt_mux);
+    uint8_t frame[sizeof(FrameHeader) + sizeof(FrameRecord)];
+    const size_t len = encode_frame(&dp, 1, head, frame);
+    return send_all(sock, reinterpret_cast<const char *>(frame), len);
+}
+
+// Ответ на adcSince=<seq> в режиме format=bin: один кадр со всеми отсчётами с seq >= from_seq.
+static bool send_since_frame(int sock, uint32_t from_seq) {
+    if (!ads_ready) return send_str(sock, "ADS1115 not ready\n");
+    if (!sampling_enabled) start_sampling();
+    std::vector<DataPoint> points(RT_BUFFER_SIZE);
+    uint32_t head = 0;
+    const int count = rt_copy_since(from_seq, points.data(), RT_BUFFER_SIZE, head);
+    std::vector<uint8_t> frame(sizeof(FrameHeader) + count * sizeof(FrameRecord));
+    const size_t len = encode_frame(points.data(), count, head, frame.data());
+    return send_all(sock, reinterpret_cast<const char *>(frame.data()), len);
+}
+
+// Режим потоковой передачи: каждый новый отсчёт из rt_buffer отправляется строкой
+// "S <seq>; <ts>; <a0>; <a1>; <a2>" (или бинарными кадрами при format=bin) до команды streamStop.
+// Если клиент не успевает читать, отсчёты вытесняются из кольцевого буфера — клиент видит пропуск по seq.
+// Возвращает false, если соединение потеряно.
+static bool stream_samples(int client_sock, bool binary) {
+    if (!ads_ready) return send_str(client_sock, "ADS1115 not ready\n");
+    if (!sampling_enabled) start_sampling();
+    if (!send_str(client_sock, "STREAM started\n")) return false;
+
+    portENTER_CRITICAL(&rt_mux);
+    uint32_t next_seq = rt_seq;
+    portEXIT_CRITICAL(&rt_mux);
+
+    DataPoint batch[STREAM_MAX_BATCH];
+    uint8_t frame[sizeof(FrameHeader) + STREAM_MAX_BATCH * sizeof(FrameRecord)];
+    std::string out;
+    out.reserve(STREAM_MAX_BATCH * 48);
+    std::string pending;
+    while (true) {
+        uint32_t head = 0;
+        const int count = rt_copy_since(next_seq, batch, STREAM_MAX_BATCH, head);
+        if (count > 0 && binary) {
+            const size_t len = encode_frame(batch, count, head, frame);
+            if (!send_all(client_sock, reinterpret_cast<const char *>(frame), len)) return false;
+            next_seq = batch[count - 1].seq + 1;
+            if (count == STREAM_MAX_BATCH) continue;
+        } else if (count > 0) {
+            out.clear();
+            for (int i = 0; i < count; ++i) {
+                char line[96];
+                const int len = snprintf(line, sizeof(line), "S %lu; %lu; %.1f; %.1f; %.1f\n",
+                                         static_cast<unsigned long>(batch[i].seq),
+                                         static_cast<unsigned long>(batch[i].timestamp_ms),
+                                         batch[i].adc0, batch[i].adc1, batch[i].adc2);
+                out.append(line, len);
+            }
+            if (!send_all(client_sock, out.data(), out.size())) return false;
+            next_seq = batch[count - 1].seq + 1;
+            if (count == STREAM_MAX_BATCH) continue;
+        }
+
+        fd_set read_fds;
+        FD_ZERO(&read_fds);
+        FD_SET(client_sock, &read_fds);
+        timeval tv{0, STREAM_POLL_MS * 1000};
+        const int ready = select(client_sock + 1, &read_fds, nullptr, nullptr, &tv);
+        if (ready < 0) return false;
+        if (ready == 0) continue;
+        char buf[64];
+        const int n = recv(client_sock, buf, sizeof(buf), 0);
+        if (n <= 0) return false;
+        pending.append(buf, n);
+        size_t nl;
+        while ((nl = pending.find('\n')) != std::string::npos) {
+            const std::string cmd = trim(pending.substr(0, nl));
+            pending.erase(0, nl + 1);
+            if (cmd == "streamStop") return send_str(client_sock, "STREAM stopped\n");
+        }
+        if (pending.size() > 256) pending.clear();
+    }
+}
+
 static void wifi_command_task(void *param) {
     // Wait until Wi-Fi is ready (AP started or STA got IP)
     xEventGroupWaitBits(wifi_event_group, WIFI_READY_BIT, pdFALSE, pdFALSE, portMAX_DELAY);
@@ -1066,6 +1342,10 @@ static void wifi_command_task(void *param) {
             continue;
         }
         ESP_LOGI(TAG, "Client connected");
+        // ответы короткие — без Nagle они уходят сразу, что нужно для конвейерных запросов
+        int nodelay = 1;
+        setsockopt(client_sock, IPPROTO_TCP, TCP_NODELAY, &nodelay, sizeof(nodelay));
+        bool binary = false; // формат отсчётов действует до конца соединения
         while (true) {
             std::string request;
             if (!recv_line(client_sock, request)) break;
@@ -1074,11 +1354,25 @@ static void wifi_command_task(void *param) {
             } else if (request.rfind("hostFile=", 0) == 0) {
                 host_file(client_sock, request.substr(9));
                 break; // close after sending file
+            } else if (trim(request) == "stream") {
+                if (!stream_samples(client_sock, binary)) break;
+            } else if (request.rfind("format=", 0) == 0) {
+                const std::string fmt = trim(request.substr(7));
+                if (fmt == "bin" || fmt == "text") {
+                    binary = fmt == "bin";
+                    send_str(client_sock, ("OK format=" + fmt + "\n").c_str());
+                } else {
+                    send_str(client_sock, ("Error: Unknown format '" + fmt + "'. Use text or bin\n").c_str());
+                }
+            } else if (binary && trim(request) == "adc") {
+                if (!send_adc_frame(client_sock)) break;
+            } else if (binary && request.rfind("adcSince=", 0) == 0) {
+                if (!send_since_frame(client_sock, parse_since_seq(trim(request)))) break;
             } else {
                 const std::string response = process_request(request) + "\n";
                 send(client_sock, response.c_str(), response.size(), 0);
             }
-            vTaskDelay(pdMS_TO_TICKS(10));
+            // recv_line блокируется до следующей команды, поэтому отдельная пауза не нужна
         }
         shutdown(client_sock, 0);
         close(client_sock);
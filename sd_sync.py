@@ -0,0 +1,60 @@
+import argparse
+import logging
+import sys
+import time
+
+from api.mirror import mirror_devices
+
+
+def parse_device(spec):
+    """``host[:port]`` or ``name=host[:port]``."""
+    name, sep, address = spec.partition("=")
+    if not sep:
+        return spec
+    host, _, port = address.partition(":")
+    return {"device_id": name, "host": host, "port": port or 80}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="EspAdc SD sync", description="Mirror SD cards of several boards, transferring only new data"
+    )
+    parser.add_argument("devices", nargs="+", help="host[:port] or name=host[:port]")
+    parser.add_argument("-o", "--output", default="sd_mirror", help="Root folder, one subfolder per board")
+    parser.add_argument("--chunk-size", default=256, type=int, help="Receive chunk, KB")
+    parser.add_argument("--retries", default=5, type=int, help="Reconnects without progress before giving up")
+    parser.add_argument("--timeout", default=10, type=float, help="Socket timeout, s")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(asctime)s %(message)s")
+
+    start = time.perf_counter()
+    summaries = mirror_devices(
+        [parse_device(device) for device in args.devices],
+        args.output,
+        chunk_size=args.chunk_size * 1024,
+        retries=args.retries,
+        timeout=args.timeout,
+    )
+    elapsed = time.perf_counter() - start
+
+    total_bytes = 0
+    failed = False
+    for summary in summaries:
+        total_bytes += summary["bytes"]
+        failed = failed or bool(summary["error"] or summary["failed"])
+        line = (
+            f"{summary['device']}: new {summary['new']}, grown {summary['grown']}, replaced {summary['replaced']}, "
+            f"unchanged {summary['unchanged']}, failed {summary['failed']}, "
+            f"{summary['bytes'] / (1024 * 1024):.2f} MB in {summary['seconds']:.1f} s"
+        )
+        if summary["error"]:
+            line += f" (Error: {summary['error']})"
+        print(line)
+    print(f"\nTotal: {total_bytes / (1024 * 1024):.2f} MB in {elapsed:.1f} s", end="")
+    print(f", {total_bytes / (1024 * 1024) / elapsed:.2f} MB/s" if elapsed > 0 else "")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,66 @@
-import json
+import logging
 import os
 import re
 from datetime import datetime
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, List, Tuple
 
 import h5py
+import numpy as np
 from PyQt5 import QtGui
 from PyQt5.QtCore import QAbstractTableModel, Qt, QModelIndex
 from PyQt5.QtWidgets import QFileDialog
 
 from constants import DataTableColumns
 
+logger = logging.getLogger(__name__)
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class DumpedArray:
+    """
+    Sample array of a restored measurement: it stays in the session dump and is read on every use
+    (``np.asarray``, ``h5py`` writes), so the restore itself reads only the metadata.
+    """
+
+    def __init__(self, path: str, name: str, shape: Tuple[int, ...], dtype):
+        self.path = path
+        self.name = name
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        with h5py.File(self.path, "r") as hdf:
+            values = hdf[self.name][()]
+        return values if dtype is None else values.astype(dtype)
+
+
+def write_measure(group: h5py.Group, measure: "MeasureModel") -> None:
+    """``measure`` in the ``save_by_index`` layout: metadata attributes and a ``data`` group with the arrays."""
+    write_measure_attrs(group, measure)
+    data_group = group.create_group("data")
+    data_group.attrs["rps"] = measure.data["rps"]
+    # учёт дубликатов и пропусков при опросе: samples, rate, duplicate_ratio, gaps, ...
+    for key, value in measure.data.get("stats", {}).items():
+        data_group.attrs[key] = value
+    data_group.create_dataset("time", data=measure.data["time"])
+
+    for key, value in measure.data["data"].items():
+        data_group.create_dataset(f"channel_{key}", data=value)
+
+
+def write_measure_attrs(group: h5py.Group, measure: "MeasureModel") -> None:
+    finished = measure.finished
+    if finished == "--":
+        finished = datetime.now()
+    group.attrs["id"] = measure.id
+    group.attrs["comment"] = measure.comment
+    group.attrs["started"] = measure.started.strftime(DATETIME_FORMAT)
+    group.attrs["finished"] = finished.strftime(DATETIME_FORMAT)
+
 
 class MeasureList(list):
     def first(self) -> Union["MeasureModel", None]:
@@ -45,6 +95,7 @@ class MeasureManager:
     table: "MeasureTableModel" = None
     _instances: MeasureList["MeasureModel"] = MeasureList()
     latest_id = 0
+    dump_path = os.path.join("dumps", "session.h5")
 
     @classmethod
     def create(cls, *args, **kwargs) -> "MeasureModel":
@@ -84,9 +135,6 @@ class MeasureManager:
     @classmethod
     def save_by_index(cls, index: int) -> None:
         measure = cls.all()[index]
-        finished = measure.finished
-        if finished == "--":
-            finished = datetime.now()
         caption = f"Saving measure {measure.id}"
         try:
             default_filename = f"{measure.comment}"
@@ -98,32 +146,109 @@ class MeasureManager:
             if not filepath.endswith(".h5"):
                 filepath += ".h5"
             with h5py.File(filepath, "w") as hdf:
-                hdf.attrs["id"] = measure.id
-                hdf.attrs["comment"] = measure.comment
-                hdf.attrs["started"] = measure.started.strftime("%Y-%m-%d %H:%M:%S")
-                hdf.attrs["finished"] = finished.strftime("%Y-%m-%d %H:%M:%S")
-
-                data_group = hdf.create_group("data")
-                data_group.attrs["rps"] = measure.data["rps"]
-                data_group.create_dataset("time", data=measure.data["time"])
-
-                for key, value in measure.data["data"].items():
-                    data_group.create_dataset(f"channel_{key}", data=value)
+                write_measure(hdf, measure)
             measure.saved = True
             measure.save(finish=False)
         except (IndexError, FileNotFoundError):
             pass
 
     @classmethod
-    def save_all(cls):
-        data = [m.to_json() for m in cls.all()]
-        if not data:
+    def save_all(cls, path: str = None):
+        """
+        Dump the session into one HDF5 file, a ``measure_<id>`` group per measurement.
+        The file is updated in place: arrays are written once, later only changed metadata is rewritten.
+        Groups of deleted measurements are dropped by rewriting the file, HDF5 does not reuse their space.
+        """
+        path = path or cls.dump_path
+        measures = cls.all()
+        if not measures and not os.path.isfile(path):
             return
-        if not os.path.exists("dumps"):
-            os.mkdir("dumps")
-        filepath = f"dumps/dump_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
-        with open(filepath, "w", encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        names = {f"measure_{m.id}": m for m in measures}
+        if os.path.isfile(path):
+            with h5py.File(path, "r") as hdf:
+                present = list(hdf.keys())
+            # группа без отметки о дампе осталась от другого измерения с тем же id — её перепишем целиком
+            keep = [name for name in present if name in names and names[name].dumped is not None]
+            if len(keep) < len(present):
+                cls._compact(path, keep)
+        with h5py.File(path, "a") as hdf:
+            for name, measure in names.items():
+                signature = measure.dump_signature()
+                if name not in hdf:
+                    write_measure(hdf.create_group(name), measure)
+                elif measure.dumped == signature:
+                    continue
+                write_measure_attrs(hdf[name], measure)
+                hdf[name].attrs["saved"] = measure.saved
+                measure.dumped = signature
+
+    @staticmethod
+    def _compact(path: str, keep: List[str]) -> None:
+        """Rewrite the dump with only the ``keep`` groups; arrays are copied inside HDF5, not through numpy."""
+        tmp_path = path + ".tmp"
+        with h5py.File(path, "r") as src, h5py.File(tmp_path, "w") as dst:
+            for name in keep:
+                src.copy(src[name], dst, name=name)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def restore(cls, path: str = None) -> int:
+        """
+        Load the measurements of ``save_all``; arrays are not read until they are used.
+        Returns the number of restored measurements.
+        """
+        path = path or cls.dump_path
+        if not os.path.isfile(path):
+            return 0
+        restored = 0
+        try:
+            with h5py.File(path, "r") as hdf:
+                # id повреждённых групп тоже заняты, иначе новое измерение попадёт в чужую группу
+                ids = [int(name[len("measure_") :]) for name in hdf if re.fullmatch(r"measure_\d+", name)]
+                cls.latest_id = max([cls.latest_id, *ids])
+                for name, group in hdf.items():
+                    try:
+                        cls._restore_measure(path, name, group)
+                    except (KeyError, ValueError) as e:
+                        logger.warning(f"[{cls.__name__}.restore] {name} is damaged: {e}")
+                        continue
+                    restored += 1
+        except OSError as e:
+            logger.error(f"[{cls.__name__}.restore] Can't read {path}: {e}")
+        cls._instances.sort(key=lambda m: m.id)
+        cls.update_table()
+        if restored:
+            logger.info(f"[{cls.__name__}.restore] {restored} measures restored from {path}")
+        return restored
+
+    @classmethod
+    def _restore_measure(cls, path: str, name: str, group: h5py.Group) -> "MeasureModel":
+        data_group = group["data"]
+        attrs = dict(data_group.attrs)
+        channels = {}
+        for key, dataset in data_group.items():
+            if key.startswith("channel_"):
+                channels[int(key[len("channel_") :])] = DumpedArray(path, dataset.name, dataset.shape, dataset.dtype)
+        time_ = data_group["time"]
+        latest_id = cls.latest_id
+        measure = cls.create(
+            data={
+                "rps": attrs.pop("rps"),
+                "stats": attrs,
+                "time": DumpedArray(path, time_.name, time_.shape, time_.dtype),
+                "data": dict(sorted(channels.items())),
+            },
+            finished=datetime.strptime(group.attrs["finished"], DATETIME_FORMAT),
+            started=datetime.strptime(group.attrs["started"], DATETIME_FORMAT),
+        )
+        # id берётся из имени группы: по нему save_all узнаёт измерение в дампе
+        measure.id = int(name[len("measure_") :])
+        cls.latest_id = max(latest_id, measure.id)
+        measure.comment = str(group.attrs.get("comment", ""))
+        measure.saved = bool(group.attrs.get("saved", False))
+        measure.dumped = measure.dump_signature()
+        return measure
 
 
 class MeasureModel:
@@ -140,14 +265,17 @@ class MeasureModel:
         self,
         data: Dict,
         finished: Any = "--",
+        started: datetime = None,
     ):
         self.data = data
         self.objects.latest_id += 1
         self.id = self.objects.latest_id
-        self.started = datetime.now()
+        self.started = started or datetime.now()
         self.finished = finished
         self.saved = False
         self.comment = ""
+        # метаданные на момент последнего save_all, None — ещё не в дампе
+        self.dumped = None
 
     def get_attr_by_ind(self, ind: int):
         attr = self.ind_attr_map.get(ind)
@@ -159,6 +287,9 @@ class MeasureModel:
             self.finished = datetime.now()
         self.objects.update_table()
 
+    def dump_signature(self) -> Tuple:
+        return self.comment, self.saved, str(self.finished)
+
     def to_json(self):
         finished = self.finished
         if finished == "--":
@@ -166,8 +297,8 @@ class MeasureModel:
         return {
             "id": self.id,
             "comment": self.comment,
-            "started": self.started.strftime("%Y-%m-%d %H:%M:%S"),
-            "finished": finished.strftime("%Y-%m-%d %H:%M:%S"),
+            "started": self.started.strftime(DATETIME_FORMAT),
+            "finished": finished.strftime(DATETIME_FORMAT),
             "data": self.data,
         }
 
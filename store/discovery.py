@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QSettings
+
+from api import EspAdc, SessionManager
+from api.constants import SOCKET
+from api.exceptions import DeviceConnectionError
+from api.utils import _normalize_mac, arp_lookup, find_ip_by_mac
+from store.state import State
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryCache:
+    """
+    Boards found before, keyed by MAC: ip, port, last seen time and RTT of the ``ip`` command.
+    Kept in the ``State`` settings under ``Discovery/<mac>``, so a known board is found without a subnet sweep.
+    """
+
+    GROUP = "Discovery"
+    # один QSettings используется из потоков GUI и фонового обновления
+    lock = threading.RLock()
+
+    def __init__(self, settings: QSettings = None):
+        self.settings = settings or State.settings
+
+    @staticmethod
+    def key(mac: str) -> str:
+        return _normalize_mac(mac)
+
+    def macs(self) -> List[str]:
+        with self.lock:
+            self.settings.beginGroup(self.GROUP)
+            try:
+                return self.settings.childGroups()
+            finally:
+                self.settings.endGroup()
+
+    def get(self, mac: str) -> Optional[Dict]:
+        prefix = f"{self.GROUP}/{self.key(mac)}"
+        with self.lock:
+            ip = self.settings.value(f"{prefix}/ip", "")
+            if not ip:
+                return None
+            return {
+                "ip": ip,
+                "port": int(self.settings.value(f"{prefix}/port", 80)),
+                "last_seen": float(self.settings.value(f"{prefix}/last_seen", 0)),
+                "rtt": float(self.settings.value(f"{prefix}/rtt", 0)),
+            }
+
+    def put(self, mac: str, ip: str, port: int = 80, rtt: float = 0.0):
+        prefix = f"{self.GROUP}/{self.key(mac)}"
+        with self.lock:
+            self.settings.setValue(f"{prefix}/ip", ip)
+            self.settings.setValue(f"{prefix}/port", int(port))
+            self.settings.setValue(f"{prefix}/last_seen", time.time())
+            self.settings.setValue(f"{prefix}/rtt", float(rtt))
+            self.settings.sync()
+
+    def remove(self, mac: str):
+        with self.lock:
+            self.settings.remove(f"{self.GROUP}/{self.key(mac)}")
+            self.settings.sync()
+
+    def validate(self, mac: str, timeout: float = 1) -> Optional[float]:
+        """
+        Check the cached address with one ``ip`` command: the board must answer with that address,
+        and the ARP table must not map the MAC elsewhere. Returns the RTT or None if the entry is stale.
+        """
+        entry = self.get(mac)
+        if entry is None:
+            return None
+        # прошивка обслуживает одного клиента: при открытой общей сессии второе соединение не получит ответа
+        session = SessionManager.find(entry["ip"], entry["port"], SOCKET)
+        try:
+            if session is None:
+                rtt, reply = self._ping(EspAdc(host=entry["ip"], port=entry["port"], adapter=SOCKET, timeout=timeout))
+            elif session.lock.acquire(timeout=timeout):
+                try:
+                    rtt, reply = self._ping(session.acquire())
+                finally:
+                    session.lock.release()
+            else:
+                # сессия занята другим потоком (например, измерением) — значит, плата на этом адресе работает
+                rtt, reply = entry["rtt"], entry["ip"]
+        except (OSError, DeviceConnectionError) as e:
+            logger.debug(f"[{self.__class__.__name__}.validate] {entry['ip']}: {e}")
+            return None
+        if reply.strip() != entry["ip"]:
+            logger.debug(f"[{self.__class__.__name__}.validate] {entry['ip']} answers as '{reply}'")
+            return None
+        arp_ip = arp_lookup(mac)
+        if arp_ip is not None and arp_ip != entry["ip"]:
+            return None
+        self.put(mac, entry["ip"], entry["port"], rtt)
+        return rtt
+
+    @staticmethod
+    def _ping(connection) -> Tuple[float, str]:
+        """RTT and reply of one ``ip`` command over ``connection`` (``EspAdc`` or ``DeviceSession.acquire()``)."""
+        with connection as daq:
+            start = time.perf_counter()
+            reply = daq.get_ip()
+            return time.perf_counter() - start, reply
+
+    def lookup(self, mac: str, port: int = 80, on_progress: Callable = None, **sweep_kwargs) -> Optional[str]:
+        """Cached IP if it is still valid, otherwise a full ``find_ip_by_mac`` sweep, whose result is cached."""
+        entry = self.get(mac)
+        if entry is not None and self.validate(mac) is not None:
+            return entry["ip"]
+        return self._sweep(mac, port, on_progress, **sweep_kwargs)
+
+    def _sweep(self, mac: str, port: int, on_progress: Callable = None, **sweep_kwargs) -> Optional[str]:
+        ip = find_ip_by_mac(mac, port=port, on_progress=on_progress, **sweep_kwargs)
+        if ip is None:
+            return None
+        self.put(mac, ip, port)
+        # заодно измеряем RTT найденной платы
+        self.validate(mac)
+        return ip
+
+    def refresh(self, max_workers: int = 8) -> Dict[str, Optional[str]]:
+        """
+        Revalidate every known board in parallel; boards that moved are searched again one by one.
+        Returns ``{mac: ip or None}``.
+        """
+        macs = self.macs()
+        if not macs:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(macs))) as pool:
+            valid = dict(zip(macs, pool.map(self.validate, macs)))
+        result = {}
+        for mac in macs:
+            entry = self.get(mac)
+            if valid[mac] is not None:
+                result[mac] = entry["ip"]
+            else:
+                result[mac] = self._sweep(mac, entry["port"] if entry else 80)
+        return result
@@ -0,0 +1,242 @@
+import io
+import logging
+import os
+from typing import Dict, List, Optional
+
+import h5py
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Строка записи на SD-карте: "<timestamp_ms>; <a0>; <a1>; <a2>\n" (flush_buffer_to_sd в прошивке)
+RECORDING_COLUMNS = 4
+CHANNELS = (1, 2, 3)
+
+
+def parse_block(block: bytes) -> np.ndarray:
+    """
+    Parse whole recording lines into an n x 4 float array (timestamp_ms, a0, a1, a2).
+    The block is converted in one numpy call; if it has damaged lines, they are skipped line by line.
+    """
+    if not block.strip():
+        return np.empty((0, RECORDING_COLUMNS))
+    lines = block.count(b"\n") + (0 if block.endswith(b"\n") else 1)
+    try:
+        # loadtxt разбирает текст в C (numpy >= 1.23) и падает на первой же битой строке
+        values = np.loadtxt(io.BytesIO(block), delimiter=";", comments=None, ndmin=2)
+        if values.shape == (lines, RECORDING_COLUMNS):
+            return values
+    except ValueError:
+        pass
+    rows = []
+    for line in block.splitlines():
+        parts = line.split(b";")
+        if len(parts) != RECORDING_COLUMNS:
+            continue
+        try:
+            rows.append([float(part) for part in parts])
+        except ValueError:
+            continue
+    logger.debug(f"[parse_block] {lines - len(rows)} damaged lines skipped")
+    return np.array(rows, dtype=float).reshape(-1, RECORDING_COLUMNS)
+
+
+class RecordingParser:
+    """Incremental parser for a recording that arrives in arbitrary pieces: a line cut by a chunk waits for the rest."""
+
+    def __init__(self):
+        self.tail = b""
+        self.bytes = 0
+
+    def feed(self, data) -> np.ndarray:
+        data = bytes(data)
+        self.bytes += len(data)
+        end = data.rfind(b"\n")
+        if end < 0:
+            self.tail += data
+            return np.empty((0, RECORDING_COLUMNS))
+        block = self.tail + data[: end + 1]
+        self.tail = data[end + 1 :]
+        return parse_block(block)
+
+    def flush(self) -> np.ndarray:
+        """The last line if the file does not end with a newline."""
+        block, self.tail = self.tail, b""
+        return parse_block(block)
+
+
+class RecordingWriter:
+    """
+    Appends parsed rows to the ``MeasureManager.save_by_index`` layout: group ``data`` with ``time`` (s from the
+    first sample) and ``channel_1..3`` datasets. The datasets are resizable, chunked and compressed,
+    rows are collected and written a chunk at a time.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_rows: int = 64 * 1024,
+        compression: Optional[str] = "gzip",
+        compression_opts: Optional[int] = 4,
+        attrs: Dict = None,
+    ):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.origin_ms: Optional[float] = None
+        self.pending: List[np.ndarray] = []
+        self.pending_rows = 0
+        self.hdf = h5py.File(path, "w")
+        for key, value in (attrs or {}).items():
+            self.hdf.attrs[key] = value
+        self.group = self.hdf.create_group("data")
+        options = {"maxshape": (None,), "chunks": (chunk_rows,), "dtype": "f8"}
+        if compression:
+            options.update(compression=compression, compression_opts=compression_opts, shuffle=True)
+        self.datasets = {"time": self.group.create_dataset("time", shape=(0,), **options)}
+        for channel in CHANNELS:
+            self.datasets[channel] = self.group.create_dataset(f"channel_{channel}", shape=(0,), **options)
+
+    def append(self, rows: np.ndarray):
+        if not len(rows):
+            return
+        if self.origin_ms is None:
+            self.origin_ms = float(rows[0, 0])
+        self.pending.append(rows)
+        self.pending_rows += len(rows)
+        if self.pending_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows = np.concatenate(self.pending) if len(self.pending) > 1 else self.pending[0]
+        self.pending, self.pending_rows = [], 0
+        start, end = self.rows, self.rows + len(rows)
+        for dataset in self.datasets.values():
+            dataset.resize((end,))
+        self.datasets["time"][start:end] = (rows[:, 0] - self.origin_ms) / 1000
+        for column, channel in enumerate(CHANNELS, start=1):
+            self.datasets[channel][start:end] = rows[:, column]
+        self.rows = end
+
+    def reset(self):
+        """Drop everything written so far."""
+        self.pending, self.pending_rows = [], 0
+        self.origin_ms = None
+        self.rows = 0
+        for dataset in self.datasets.values():
+            dataset.resize((0,))
+
+    def close(self):
+        if self.hdf is None:
+            return
+        self.flush()
+        self.group.attrs["rows"] = self.rows
+        if self.origin_ms is not None:
+            self.group.attrs["ts_origin_ms"] = self.origin_ms
+        if self.rows > 1:
+            # частота записи по меткам времени, как rps у измерений из GUI
+            time = self.datasets["time"]
+            sample = time[: min(self.rows, self.chunk_rows)]
+            step = np.median(np.diff(sample)) if len(sample) > 1 else 0
+            self.group.attrs["rps"] = float(1 / step) if step > 0 else 0.0
+        self.hdf.close()
+        self.hdf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RecordingConverter:
+    """
+    Download pipeline stage: pass ``on_data`` to ``EspAdc.download_file`` and the HDF5 file is complete
+    as soon as the transfer is. ``on_data(chunk, position)`` gets every piece of the file with its offset;
+    pieces sent again after a reconnect are recognised by the offset and skipped. A piece at offset 0
+    after some data means the download started over (the file on the card changed), so the output is reset.
+    """
+
+    def __init__(self, path: str, **writer_kwargs):
+        self.path = path
+        self.parser = RecordingParser()
+        self.writer = RecordingWriter(path, **writer_kwargs)
+
+    @property
+    def rows(self) -> int:
+        return self.writer.rows + self.writer.pending_rows
+
+    def restart(self):
+        self.parser = RecordingParser()
+        self.writer.reset()
+
+    def on_data(self, chunk, position: int):
+        if position == 0 and self.parser.bytes:
+            logger.info(f"[{self.__class__.__name__}.on_data] {self.path}: download restarted, converting anew")
+            self.restart()
+        consumed = self.parser.bytes
+        if position + len(chunk) <= consumed:
+            return
+        if position > consumed:
+            raise ValueError(f"Recording stream has a hole: got offset {position}, expected {consumed}")
+        self.writer.append(self.parser.feed(chunk[consumed - position :]))
+
+    def close(self):
+        self.writer.append(self.parser.flush())
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def is_converted(path: str, output: str) -> bool:
+    """The ``.h5`` was made from this very file: size and mtime of the source are stored in its attributes."""
+    if not os.path.isfile(output):
+        return False
+    stat = os.stat(path)
+    try:
+        with h5py.File(output, "r") as hdf:
+            return (
+                int(hdf.attrs.get("source_size", -1)) == stat.st_size
+                and int(hdf.attrs.get("source_mtime_ns", -1)) == stat.st_mtime_ns
+            )
+    except OSError:
+        # недописанный или повреждённый файл
+        return False
+
+
+def convert_recording(path: str, output: str, read_size: int = 8 * 1024 * 1024, **writer_kwargs) -> int:
+    """
+    Convert a whole text recording to HDF5, reading it ``read_size`` bytes at a time.
+    The result appears under ``output`` only when it is complete. Returns the number of rows.
+    """
+    stat = os.stat(path)
+    attrs = {
+        "file": os.path.basename(path),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+    }
+    attrs.update(writer_kwargs.pop("attrs", None) or {})
+    tmp_path = output + ".tmp"
+    try:
+        with open(path, "rb") as f, RecordingConverter(tmp_path, attrs=attrs, **writer_kwargs) as converter:
+            position = 0
+            while True:
+                block = f.read(read_size)
+                if not block:
+                    break
+                converter.on_data(block, position)
+                position += len(block)
+        # последняя строка без перевода строки попадает в запись только при закрытии
+        rows = converter.rows
+    except BaseException:
+        if os.path.isfile(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, output)
+    return rows
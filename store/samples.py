@@ -0,0 +1,74 @@
+import logging
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SampleStore:
+    """
+    Append-only store of acquisition rows (time, AI1, AI2, AI3) for the ``MeasureModel.data`` layout.
+
+    Rows are copied into preallocated chunks of ``CHUNK_ROWS``, so an append is amortized O(1) and never copies
+    what was stored before. When the chunks in memory exceed ``max_bytes``, the oldest of them are spilled
+    to temporary files, one per column; ``columns()`` then returns the columns memory-mapped from those files,
+    so a long run costs disk space, not RAM.
+    """
+
+    CHUNK_ROWS = 16 * 1024
+
+    def __init__(self, columns: int = 4, max_bytes: int = 256 * 1024 * 1024):
+        self.width = columns
+        self.max_bytes = max_bytes
+        self.chunks: List[np.ndarray] = []
+        self.current = np.empty((self.CHUNK_ROWS, columns))
+        self.filled = 0
+        self.rows = 0
+        self.spilled = 0
+        self.files: Optional[List] = None
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory."""
+        return (len(self.chunks) + 1) * self.current.nbytes
+
+    def append(self, rows: np.ndarray):
+        self.rows += len(rows)
+        while len(rows):
+            n = min(len(rows), self.CHUNK_ROWS - self.filled)
+            self.current[self.filled : self.filled + n] = rows[:n]
+            self.filled += n
+            rows = rows[n:]
+            if self.filled == self.CHUNK_ROWS:
+                self.chunks.append(self.current)
+                self.current = np.empty((self.CHUNK_ROWS, self.width))
+                self.filled = 0
+                while self.chunks and self.nbytes > self.max_bytes:
+                    self._spill(self.chunks.pop(0))
+
+    def _spill(self, rows: np.ndarray):
+        if self.files is None:
+            self.files = [tempfile.TemporaryFile(prefix="espadc_") for _ in range(self.width)]
+            logger.info(f"[{self.__class__.__name__}._spill] Memory limit reached, older samples go to disk")
+        for column, file in enumerate(self.files):
+            file.write(np.ascontiguousarray(rows[:, column]).tobytes())
+        self.spilled += len(rows)
+
+    def columns(self) -> List[np.ndarray]:
+        """Finish the run: whole columns as contiguous arrays, the chunks are released."""
+        chunks = self.chunks + [self.current[: self.filled]]
+        self.chunks, self.current, self.filled = [], np.empty((0, self.width)), 0
+        if self.files is None:
+            return [np.concatenate([chunk[:, column] for chunk in chunks]) for column in range(self.width)]
+        for chunk in chunks:
+            self._spill(chunk)
+        result = []
+        for file in self.files:
+            file.flush()
+            result.append(np.memmap(file, dtype=float, mode="r", shape=(self.spilled,)))
+        return result
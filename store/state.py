@@ -31,8 +31,14 @@ class State:
     duration: int = int(settings.value("Measure/duration", 60))
     is_plot_data: bool = settings.value("Measure/is_plot_data", "true") == "true"
     plot_window: int = int(settings.value("Measure/plot_window", 20))
+    plot_history: bool = settings.value("Measure/plot_history", "false") == "true"
     store_data: bool = settings.value("Measure/store_data", "true") == "true"
+    store_ram_mb: int = int(settings.value("Measure/store_ram_mb", 256))
     rps: int = int(settings.value("Measure/rps", 5))
+    schedule_policy: str = settings.value("Measure/schedule_policy", "skip")
+    stream: bool = settings.value("Measure/stream", "false") == "true"
+
+    convert_hdf5: bool = settings.value("SD/convert_hdf5", "false") == "true"
 
     @classmethod
     def store_state(cls):
@@ -50,7 +56,13 @@ class State:
         cls.settings.setValue("Measure/duration", cls.duration)
         cls.settings.setValue("Measure/is_plot_data", cls.is_plot_data)
         cls.settings.setValue("Measure/plot_window", cls.plot_window)
+        cls.settings.setValue("Measure/plot_history", cls.plot_history)
         cls.settings.setValue("Measure/store_data", cls.store_data)
+        cls.settings.setValue("Measure/store_ram_mb", cls.store_ram_mb)
         cls.settings.setValue("Measure/rps", cls.rps)
+        cls.settings.setValue("Measure/schedule_policy", cls.schedule_policy)
+        cls.settings.setValue("Measure/stream", cls.stream)
+
+        cls.settings.setValue("SD/convert_hdf5", cls.convert_hdf5)
 
         cls.settings.sync()